@@ -5,30 +5,81 @@ Flask Application for DETR Object Detection
 import os
 import io
 import base64
-from flask import Flask, render_template, request, jsonify, send_file
+import time
+import threading
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from PIL import Image
 import traceback
 
-from model.detr_detector import DETRDetector
 from model.config import Config
+from models.resolution import resolve_resolution
+from utils.encoding import BINARY_MEDIA_TYPE, dumps_json, encode_binary, wants_binary
+from utils.metrics import REQUESTS_IN_PROGRESS, record_request, render_metrics, time_stage
+from utils.preprocessing import decode_image
 
 
 # Global detector instance (lazy loaded)
 detector = None
 
+# Model loading and warmup state, reported by /api/ready
+readiness = {'state': 'not_started'}
+ready = threading.Event()
+
 
 def get_detector():
-    """Get or create detector instance"""
+    """Get or create detector instance (imports torch and transformers on first call)"""
     global detector
     if detector is None:
+        from model.detr_detector import DETRDetector
         detector = DETRDetector()
     return detector
 
 
-def create_app():
-    """Create and configure Flask application"""
+def warm_up_detector():
+    """Load the model and run warmup passes at typical resolutions"""
+    global readiness
+    try:
+        readiness = {'state': 'loading'}
+        start_time = time.time()
+        det = get_detector()
+        det.load_model()
+        load_time = time.time() - start_time
+        
+        readiness = {'state': 'warming_up', 'load_time': round(load_time, 3)}
+        start_time = time.time()
+        for width, height in Config.WARMUP_RESOLUTIONS:
+            image = Image.new('RGB', (width, height))
+            for _ in range(Config.WARMUP_ITERATIONS):
+                det.detect(image)
+        
+        readiness = {
+            'state': 'ready',
+            'load_time': round(load_time, 3),
+            'warmup_time': round(time.time() - start_time, 3)
+        }
+        ready.set()
+    except Exception as e:
+        readiness = {'state': 'failed', 'error': str(e)}
+
+
+def start_warmup():
+    """Load and warm up the model in a background thread"""
+    thread = threading.Thread(target=warm_up_detector, name='tedr-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def create_app(warmup=True):
+    """
+    Create and configure Flask application
+    
+    Args:
+        warmup: Load and warm up the model in the background right away.
+            Pass False when the app is created before forking workers
+            (see gunicorn.conf.py), which then warm up after the fork.
+    """
     app = Flask(__name__)
     app.config['MAX_CONTENT_LENGTH'] = Config.MAX_IMAGE_SIZE
     app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
@@ -39,18 +90,45 @@ def create_app():
     # Ensure upload folder exists
     os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
     
+    if warmup:
+        start_warmup()
+    
     @app.route('/')
     def index():
         """Serve main UI page"""
         return render_template('index.html')
     
+    @app.before_request
+    def start_request_metrics():
+        """Track detection requests in progress"""
+        if request.path == '/api/detect':
+            REQUESTS_IN_PROGRESS.inc()
+    
+    @app.after_request
+    def record_request_metrics(response):
+        """Count detection requests by status"""
+        if request.path == '/api/detect':
+            REQUESTS_IN_PROGRESS.dec()
+            record_request(request.path, response.status_code)
+        return response
+    
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics endpoint"""
+        body, content_type = render_metrics()
+        return Response(body, content_type=content_type)
+    
     @app.route('/api/detect', methods=['POST'])
     def detect_objects():
         """
         API endpoint for object detection
         
-        Accepts: multipart/form-data with image file
-        Returns: JSON with detections, annotated image (base64), and statistics
+        Accepts: multipart/form-data with image file; optional ?resolution=
+            query parameter ("fast", "balanced", "accurate" or a shortest
+            edge in pixels) and ?annotate=1 to include the annotated image
+        Returns: JSON with detections, statistics and, with annotate, the
+            annotated image (base64), or detections only in the packed binary
+            format when the Accept header asks for application/x-tedr-detections
         """
         try:
             # Check if image file is present
@@ -69,31 +147,62 @@ def create_app():
                     'error': f'Invalid file type. Allowed types: {", ".join(Config.ALLOWED_EXTENSIONS)}'
                 }), 400
             
+            # Get detector and the requested inference resolution
+            det = get_detector()
+            resolution = det.resolution
+            if request.args.get('resolution'):
+                try:
+                    resolution = resolve_resolution(request.args['resolution'])
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+            
             # Read image
             try:
-                image = Image.open(file.stream).convert('RGB')
+                with time_stage('decode'):
+                    image, original_size = decode_image(file.stream, *resolution)
             except Exception as e:
                 return jsonify({'error': f'Invalid image file: {str(e)}'}), 400
             
-            # Get detector and perform detection
-            det = get_detector()
-            result = det.detect(image)
+            # Perform detection
+            result = det.detect(image, original_size, resolution)
             
-            # Convert annotated image to base64
-            img_buffer = io.BytesIO()
-            result['annotated_image'].save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+            if wants_binary(request.headers.get('Accept')):
+                with time_stage('serialize'):
+                    body = encode_binary({
+                        'detections': result['detections'],
+                        'image_size': list(original_size)
+                    })
+                return Response(body, status=200, mimetype=BINARY_MEDIA_TYPE, headers={'Vary': 'Accept'})
             
-            # Prepare response
-            response = {
-                'success': True,
-                'detections': result['detections'],
-                'statistics': result['statistics'],
-                'annotated_image': f'data:image/png;base64,{img_base64}'
-            }
+            # Only draw the annotated image when the client asks for it. The
+            # model saw a reduced-scale decode, so draw on the full upload
+            annotated_image = None
+            if request.args.get('annotate', '').lower() in ('1', 'true', 'yes'):
+                with time_stage('decode'):
+                    file.stream.seek(0)
+                    full_image = Image.open(file.stream).convert('RGB')
+                annotated_image = result['render'](full_image)
             
-            return jsonify(response), 200
+            with time_stage('serialize'):
+                # Prepare response
+                response = {
+                    'success': True,
+                    'detections': result['detections'],
+                    'statistics': result['statistics']
+                }
+                if 'early_exit' in result:
+                    response['early_exit'] = result['early_exit']
+                
+                if annotated_image is not None:
+                    # Convert annotated image to base64
+                    img_buffer = io.BytesIO()
+                    annotated_image.save(img_buffer, format='PNG')
+                    img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+                    response['annotated_image'] = f'data:image/png;base64,{img_base64}'
+                
+                body = dumps_json(response)
+            
+            return Response(body, status=200, mimetype='application/json', headers={'Vary': 'Accept'})
             
         except Exception as e:
             # Log error
@@ -109,10 +218,18 @@ def create_app():
         """Health check endpoint"""
         return jsonify({
             'status': 'healthy',
+            'ready': ready.is_set(),
             'model': Config.MODEL_NAME,
             'device': Config.DEVICE
         }), 200
     
+    @app.route('/api/ready', methods=['GET'])
+    def readiness_check():
+        """Readiness probe: 200 once the model is loaded and warmed up, 503 before"""
+        if not ready.is_set():
+            return jsonify({'ready': False, **readiness}), 503
+        return jsonify({'ready': True, **readiness}), 200
+    
     @app.errorhandler(413)
     def request_entity_too_large(error):
         """Handle file too large error"""
@@ -119,8 +119,8 @@ async function performDetection() {
     formData.append('image', selectedFile);
     
     try {
-        // Call API
-        const response = await fetch('/api/detect', {
+        // Call API (annotate=1: the server only draws the annotated image on request)
+        const response = await fetch('/api/detect?annotate=1', {
             method: 'POST',
             body: formData
         });
@@ -0,0 +1,240 @@
+"""Content-addressed detection result cache for TEDR."""
+import os
+import json
+import time
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+class DetectionCache:
+    """LRU + TTL cache of detection results keyed on image content.
+    
+    Results are kept in memory up to max_entries (least recently used
+    entries are evicted first) and expire after ttl_seconds. An optional
+    disk tier stores results as JSON files so they survive restarts and are
+    shared by worker processes on the same host.
+    
+    Concurrent requests for the same key are coalesced: the first caller
+    runs the computation and the others wait for its result.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        disk_dir: Optional[str] = None,
+        disk_ttl_seconds: float = 86400.0,
+        disk_max_entries: int = 100000
+    ):
+        """Initialize cache.
+        
+        Args:
+            max_entries: Maximum number of results kept in memory
+            ttl_seconds: Time after which an in-memory result expires
+            disk_dir: Directory for the disk tier (None disables it)
+            disk_ttl_seconds: Time after which a result on disk expires
+            disk_max_entries: Maximum number of result files on disk
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_ttl_seconds = float(disk_ttl_seconds)
+        self.disk_max_entries = max(1, int(disk_max_entries))
+        
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+    
+    @staticmethod
+    def make_key(
+        image_bytes: bytes,
+        model_name: str,
+        confidence_threshold: float,
+        image_size,
+        roi=None
+    ) -> str:
+        """Build a cache key from image content and inference settings.
+        
+        Args:
+            image_bytes: Encoded image data
+            model_name: Name or path of the model producing the result
+            confidence_threshold: Detection confidence threshold
+            image_size: Inference resolution (shortest edge or
+                (shortest, longest) tuple)
+            roi: Region of interest the result is limited to, if any
+            
+        Returns:
+            Hex digest identifying the result
+        """
+        digest = hashlib.sha256(image_bytes)
+        digest.update(f"|{model_name}|{confidence_threshold}|{image_size}".encode())
+        if roi is not None:
+            digest.update(f"|roi={roi.to_list()}".encode())
+        return digest.hexdigest()
+    
+    def get_or_compute(self, key: str, compute: Callable[[], Dict]) -> Dict:
+        """Return the cached result for key, computing it on a miss.
+        
+        Args:
+            key: Cache key from make_key
+            compute: Callable producing the result on a miss
+            
+        Returns:
+            Copy of the detection result dictionary
+        """
+        with self._lock:
+            result = self._get_memory(key)
+            if result is not None:
+                self._counters["hits"] += 1
+                return copy.deepcopy(result)
+            
+            future = self._inflight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                owner = True
+        
+        if not owner:
+            return copy.deepcopy(future.result())
+        
+        try:
+            result = self._get_disk(key)
+            if result is not None:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+            else:
+                with self._lock:
+                    self._counters["misses"] += 1
+                result = compute()
+                self._put_disk(key, result)
+            
+            with self._lock:
+                self._put_memory(key, result)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        
+        return copy.deepcopy(result)
+    
+    def _get_memory(self, key: str) -> Optional[Dict]:
+        """Look up an unexpired in-memory entry (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        created, result = entry
+        if time.time() - created > self.ttl_seconds:
+            del self._entries[key]
+            self._counters["expirations"] += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        return result
+    
+    def _put_memory(self, key: str, result: Dict):
+        """Insert an entry, evicting the least recently used ones (caller holds the lock)."""
+        self._entries[key] = (time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+    
+    def _disk_path(self, key: str) -> Path:
+        """Get the file path of a key in the disk tier."""
+        return self.disk_dir / f"{key}.json"
+    
+    def _get_disk(self, key: str) -> Optional[Dict]:
+        """Look up an unexpired result in the disk tier."""
+        if self.disk_dir is None:
+            return None
+        
+        path = self._disk_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.disk_ttl_seconds:
+                path.unlink()
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _put_disk(self, key: str, result: Dict):
+        """Write a result to the disk tier atomically."""
+        if self.disk_dir is None:
+            return
+        
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 1000 == 0
+        if prune:
+            self._prune_disk()
+    
+    def _prune_disk(self):
+        """Delete the oldest result files when the disk tier is over its limit."""
+        files = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.disk_max_entries)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def stats(self) -> Dict:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss/eviction counters, hit rate and size
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        
+        lookups = counters["hits"] + counters["disk_hits"] + counters["misses"] + counters["coalesced"]
+        hit_rate = (lookups - counters["misses"]) / lookups if lookups else 0.0
+        return {
+            **counters,
+            "hit_rate": round(hit_rate, 3),
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_enabled": self.disk_dir is not None
+        }
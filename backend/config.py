@@ -63,15 +63,167 @@ class Config:
         return self.get('model.confidence_threshold', 0.7)
     
     @property
-    def image_size(self) -> int:
-        """Get image size for model input."""
+    def image_size(self):
+        """Get image size for model input (shortest edge or preset name)."""
         return self.get('model.image_size', 800)
     
+    @property
+    def max_image_size(self) -> int:
+        """Get longest image edge (None scales it with image_size)."""
+        return self.get('model.max_image_size')
+    
+    @property
+    def model_version(self) -> str:
+        """Get version label of the model loaded at startup."""
+        return str(self.get('model.version', 'default'))
+    
+    @property
+    def max_model_versions(self) -> int:
+        """Get number of model versions kept loaded at once."""
+        return self.get('model.max_versions', 2)
+    
     @property
     def device(self) -> str:
         """Get device for model inference."""
         return self.get('model.device', 'cuda')
     
+    @property
+    def precision(self) -> str:
+        """Get inference precision ('fp32', 'int8', 'bf16' or 'fp16')."""
+        return self.get('model.precision', 'fp32')
+    
+    @property
+    def quantized_cache_dir(self) -> str:
+        """Get directory caching the INT8 quantized model."""
+        return self.get('model.quantized_cache_dir', './cache/quantized')
+    
+    @property
+    def backend(self) -> str:
+        """Get inference runtime ('torch' or 'onnx')."""
+        return self.get('model.backend', 'torch')
+    
+    @property
+    def onnx_path(self) -> str:
+        """Get directory of the exported ONNX model."""
+        return self.get('model.onnx_path', './exported/detr-onnx')
+    
+    @property
+    def max_concurrency(self) -> int:
+        """Get number of inference calls allowed to run at once."""
+        return self.get('inference.max_concurrency', 8)
+    
+    @property
+    def max_queue_size(self) -> int:
+        """Get number of inference calls allowed to wait for a worker."""
+        return self.get('inference.max_queue_size', 32)
+    
+    @property
+    def retry_after(self) -> int:
+        """Get Retry-After value (seconds) sent when the queue is full."""
+        return self.get('inference.retry_after', 1)
+    
+    @property
+    def stream_max_in_flight(self) -> int:
+        """Get number of frames processed at once per streaming connection."""
+        return self.get('inference.stream_max_in_flight', 2)
+    
+    @property
+    def batching_enabled(self) -> bool:
+        """Get whether images are batched into shared forward passes (opt-in, for GPUs)."""
+        return self.get('inference.batching.enabled', False)
+    
+    @property
+    def max_batch_size(self) -> int:
+        """Get maximum number of images per batched forward pass (1 when batching is off)."""
+        if not self.batching_enabled:
+            return 1
+        return self.get('inference.batching.max_batch_size', 8)
+    
+    @property
+    def max_batch_wait_ms(self) -> float:
+        """Get maximum time to wait for a batch to fill, in milliseconds."""
+        return self.get('inference.batching.max_wait_ms', 10)
+    
+    @property
+    def bucketing_enabled(self) -> bool:
+        """Get whether batch uploads are grouped by image shape before batching."""
+        return self.get('inference.batching.bucketing.enabled', True)
+    
+    @property
+    def bucket_granularity(self) -> int:
+        """Get bucket size in pixels of the resized image height and width."""
+        return self.get('inference.batching.bucketing.granularity', 64)
+    
+    @property
+    def bucket_max_padding(self) -> float:
+        """Get largest padding fraction allowed when mixing buckets in one batch."""
+        return self.get('inference.batching.bucketing.max_padding', 0.2)
+    
+    @property
+    def bucket_window(self) -> int:
+        """Get number of uploaded images grouped into buckets at once."""
+        return self.get('inference.batching.bucketing.window', 32)
+    
+    @property
+    def warmup_enabled(self) -> bool:
+        """Get whether warmup passes run at startup."""
+        return self.get('inference.warmup.enabled', True)
+    
+    @property
+    def warmup_iterations(self) -> int:
+        """Get number of warmup passes per resolution."""
+        return self.get('inference.warmup.iterations', 1)
+    
+    @property
+    def warmup_resolutions(self) -> list:
+        """Get image sizes [width, height] used for warmup passes."""
+        return self.get('inference.warmup.resolutions', [[1280, 720], [640, 480]])
+    
+    @property
+    def early_exit_enabled(self) -> bool:
+        """Get whether the decoder stops once its predictions settle."""
+        return self.get('inference.early_exit.enabled', False)
+    
+    @property
+    def early_exit_margin(self) -> float:
+        """Get score distance from the threshold required to exit early."""
+        return self.get('inference.early_exit.margin', 0.1)
+    
+    @property
+    def early_exit_min_layers(self) -> int:
+        """Get number of decoder layers that always run."""
+        return self.get('inference.early_exit.min_layers', 3)
+    
+    @property
+    def cache_enabled(self) -> bool:
+        """Get whether detection results are cached."""
+        return self.get('inference.cache.enabled', True)
+    
+    @property
+    def cache_max_entries(self) -> int:
+        """Get maximum number of cached results kept in memory."""
+        return self.get('inference.cache.max_entries', 1024)
+    
+    @property
+    def cache_ttl_seconds(self) -> float:
+        """Get time after which an in-memory cached result expires."""
+        return self.get('inference.cache.ttl_seconds', 300)
+    
+    @property
+    def cache_disk_dir(self) -> str:
+        """Get directory of the disk cache tier (None when disabled)."""
+        return self.get('inference.cache.disk_dir')
+    
+    @property
+    def cache_disk_ttl_seconds(self) -> float:
+        """Get time after which a cached result on disk expires."""
+        return self.get('inference.cache.disk_ttl_seconds', 86400)
+    
+    @property
+    def roi_cameras(self) -> Dict[str, Any]:
+        """Get regions of interest by camera name (polygon or rect in pixels)."""
+        return self.get('roi.cameras') or {}
+    
     @property
     def coco_classes(self) -> Dict[int, str]:
         """Get COCO class mapping."""
@@ -87,6 +239,16 @@ class Config:
         """Get API port."""
         return self.get('api.port', 8000)
     
+    @property
+    def api_workers(self) -> int:
+        """Get number of worker processes for multi-process serving."""
+        return self.get('api.workers') or os.cpu_count() or 1
+    
+    @property
+    def admin_token(self) -> str:
+        """Get token for model management endpoints (None disables them)."""
+        return os.environ.get('TEDR_ADMIN_TOKEN') or self.get('api.admin_token')
+    
     @property
     def cors_origins(self) -> list:
         """Get CORS origins."""
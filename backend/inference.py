@@ -1,39 +1,434 @@
 """Inference logic for TEDR object detection."""
 import time
+import queue
+import asyncio
+import tarfile
+import zipfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from PIL import Image
-from typing import Dict, List
-import io
-from models.detr_model import DETRModel
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from models.bucketing import BucketedBatcher
+from models.detr_model import DETRModel, resolve_resolution
+from backend.cache import DetectionCache
 from backend.config import config
+from backend.registry import ModelRegistry
+from utils.metrics import QUEUE_DEPTH, time_stage
+from utils.preprocessing import decode_image, decode_image_region
+from utils.roi import RegionOfInterest, RoiError
+
+
+# File extensions treated as images inside uploaded archives
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+# File extensions and content types of supported archives
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+ARCHIVE_CONTENT_TYPES = (
+    'application/zip',
+    'application/x-zip-compressed',
+    'application/x-tar',
+    'application/gzip',
+    'application/x-gzip'
+)
+
+
+class QueueFullError(Exception):
+    """Raised when the inference wait queue is full."""
+
+
+class InferenceExecutor:
+    """Dedicated thread pool that keeps inference off the asyncio event loop.
+    
+    At most max_concurrency calls run at once and at most max_queue_size
+    more may wait for a free worker. Further submissions are rejected
+    immediately with QueueFullError so callers can shed load instead of
+    piling up until they time out.
+    """
+    
+    def __init__(self, max_concurrency: int = 8, max_queue_size: int = 32):
+        """Initialize executor.
+        
+        Args:
+            max_concurrency: Number of worker threads running inference
+            max_queue_size: Number of calls allowed to wait for a worker
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue_size = max(0, int(max_queue_size))
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="tedr-inference"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._rejected = 0
+    
+    async def run(self, fn, *args):
+        """Run a blocking function on the executor and await its result.
+        
+        Args:
+            fn: Blocking callable
+            *args: Arguments passed to fn
+            
+        Returns:
+            Return value of fn
+            
+        Raises:
+            QueueFullError: If all workers are busy and the wait queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_concurrency + self.max_queue_size:
+                self._rejected += 1
+                raise QueueFullError(
+                    f"Inference queue is full ({self.max_queue_size} waiting)"
+                )
+            self._pending += 1
+            QUEUE_DEPTH.set(self._pending - self._running)
+        
+        future = self._executor.submit(self._call, fn, *args)
+        # Release the slot when the work finishes, even if the caller went away
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+    
+    def _call(self, fn, *args):
+        """Run fn on a worker thread while tracking the running count."""
+        with self._lock:
+            self._running += 1
+            QUEUE_DEPTH.set(self._pending - self._running)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+    
+    def _release(self, future: Future):
+        """Free the slot held by a finished call."""
+        with self._lock:
+            self._pending -= 1
+            QUEUE_DEPTH.set(self._pending - self._running)
+    
+    def stats(self) -> Dict:
+        """Get executor load statistics.
+        
+        Returns:
+            Dictionary with running and queued call counts
+        """
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue_size": self.max_queue_size,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "rejected": self._rejected
+            }
+    
+    def shutdown(self):
+        """Wait for running calls and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+class BatchScheduler:
+    """Dynamic micro-batching scheduler for DETR inference.
+    
+    Images submitted from any thread are collected until either
+    max_batch_size images are pending or max_wait_ms has passed since the
+    first one arrived. The collected images are then run through
+    DETRModel.detect_batch as one padded forward pass and each caller's
+    future is resolved with its own result. Images requested at different
+    resolutions share a batch window but run in separate forward passes.
+    """
+    
+    def __init__(
+        self,
+        model: DETRModel,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0
+    ):
+        """Initialize the scheduler and start its worker thread.
+        
+        Args:
+            model: DETR model used to run batched inference
+            max_batch_size: Maximum number of images per forward pass
+            max_wait_ms: Maximum time to wait for a batch to fill, in milliseconds
+        """
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = float(max_wait_ms)
+        
+        self._queue: "queue.Queue[Optional[Tuple[Image.Image, Tuple, Tuple, Future]]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._num_batches = 0
+        self._num_images = 0
+        self._batch_size_counts: Dict[int, int] = {}
+        
+        self._worker = threading.Thread(
+            target=self._run,
+            name="tedr-batch-scheduler",
+            daemon=True
+        )
+        self._worker.start()
+    
+    def submit(
+        self,
+        image: Image.Image,
+        original_size: Tuple[int, int] = None,
+        resolution: Tuple[int, int] = None
+    ) -> Future:
+        """Queue an image for batched detection.
+        
+        Args:
+            image: PIL Image object
+            original_size: Full-resolution (width, height) to map boxes to
+                when image was decoded at reduced scale
+            resolution: (shortest edge, longest edge) to resize to
+                (default: the model's resolution)
+            
+        Returns:
+            Future resolving to the detection dictionary for this image
+        """
+        future = Future()
+        self._queue.put((image, original_size, resolution or self.model.resolution, future))
+        return future
+    
+    def detect(
+        self,
+        image: Image.Image,
+        original_size: Tuple[int, int] = None,
+        resolution: Tuple[int, int] = None
+    ) -> Dict:
+        """Queue an image and block until its detections are ready.
+        
+        Args:
+            image: PIL Image object
+            original_size: Full-resolution (width, height) to map boxes to
+            resolution: (shortest edge, longest edge) to resize to
+            
+        Returns:
+            Dictionary containing detections and metadata
+        """
+        return self.submit(image, original_size, resolution).result()
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the worker thread after the pending batches are processed.
+        
+        Args:
+            timeout: Maximum time to wait for the worker, in seconds
+        """
+        self._queue.put(None)
+        self._worker.join(timeout)
+    
+    def _collect_batch(self) -> List[Tuple[Image.Image, Tuple[int, int], Tuple[int, int], Future]]:
+        """Block for the first pending image, then fill the batch until the deadline.
+        
+        Returns:
+            List of (image, original size, resolution, future) items, empty
+            when the scheduler is shut down
+        """
+        item = self._queue.get()
+        if item is None:
+            return []
+        
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then let the worker exit
+                self._queue.put(None)
+                break
+            batch.append(item)
+        
+        return batch
+    
+    def _run(self):
+        """Worker loop: collect batches and run them through the model."""
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                return
+            
+            # Drop requests whose callers have already given up
+            batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            
+            # Images are only padded together when resized to the same resolution
+            groups: Dict[Tuple[int, int], list] = {}
+            for item in batch:
+                groups.setdefault(item[2], []).append(item)
+            
+            for resolution, group in groups.items():
+                images, original_sizes, _, futures = zip(*group)
+                try:
+                    results = self.model.detect_batch(
+                        list(images),
+                        list(original_sizes),
+                        resolution=resolution
+                    )
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                else:
+                    for future, result in zip(futures, results):
+                        future.set_result(result)
+                
+                self._record_batch(len(group))
+    
+    def _record_batch(self, batch_size: int):
+        """Update batch-fill statistics.
+        
+        Args:
+            batch_size: Number of images in the completed batch
+        """
+        with self._stats_lock:
+            self._num_batches += 1
+            self._num_images += batch_size
+            self._batch_size_counts[batch_size] = self._batch_size_counts.get(batch_size, 0) + 1
+    
+    def stats(self) -> Dict:
+        """Get batch-fill statistics.
+        
+        Returns:
+            Dictionary with batch counts, average batch size and fill ratio
+        """
+        with self._stats_lock:
+            num_batches = self._num_batches
+            num_images = self._num_images
+            histogram = dict(sorted(self._batch_size_counts.items()))
+        
+        avg_batch_size = num_images / num_batches if num_batches else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": self._queue.qsize(),
+            "batches": num_batches,
+            "images": num_images,
+            "avg_batch_size": round(avg_batch_size, 3),
+            "avg_fill_ratio": round(avg_batch_size / self.max_batch_size, 3),
+            "batch_size_histogram": histogram
+        }
 
 
 class ObjectDetector:
     """Main object detector class."""
     
-    def __init__(self):
-        """Initialize object detector with DETR model."""
+    def __init__(self, model_name: str = None, onnx_path: str = None, version: str = None):
+        """Initialize object detector with DETR model.
+        
+        Args:
+            model_name: Model name or checkpoint directory (default: model.name)
+            onnx_path: Exported model directory for the onnx backend
+                (default: model.onnx_path)
+            version: Model version label, part of the cache key so versions
+                loaded from the same path never share results
+        """
+        self.version = version
         self.model = DETRModel(
-            model_name=config.model_name,
+            model_name=model_name or config.model_name,
             confidence_threshold=config.confidence_threshold,
-            device=config.device
+            device=config.device,
+            batch_size=config.max_batch_size,
+            precision=config.precision,
+            quantized_cache_dir=config.quantized_cache_dir,
+            backend=config.backend,
+            onnx_path=onnx_path or config.onnx_path,
+            image_size=config.image_size,
+            max_image_size=config.max_image_size,
+            early_exit=config.early_exit_enabled,
+            early_exit_margin=config.early_exit_margin,
+            early_exit_min_layers=config.early_exit_min_layers
         )
+        
+        # Reuse results for byte-identical uploads
+        self.cache = None
+        if config.cache_enabled:
+            self.cache = DetectionCache(
+                max_entries=config.cache_max_entries,
+                ttl_seconds=config.cache_ttl_seconds,
+                disk_dir=config.cache_disk_dir,
+                disk_ttl_seconds=config.cache_disk_ttl_seconds
+            )
+        
+        # Group batch uploads by image shape to keep padding low
+        self.batcher = BucketedBatcher(
+            self.model,
+            batch_size=config.max_batch_size,
+            bucketing=config.bucketing_enabled,
+            granularity=config.bucket_granularity,
+            max_padding=config.bucket_max_padding
+        )
+        
+        # Micro-batch concurrent requests into shared forward passes
+        self.scheduler = None
+        self.start_scheduler()
     
-    def process_image(self, image_bytes: bytes) -> Dict:
+    def start_scheduler(self):
+        """Create the micro-batching scheduler and its worker thread.
+        
+        Also used to restart batching in a forked worker, since threads of
+        the parent process do not survive the fork.
+        """
+        self.scheduler = None
+        if config.batching_enabled:
+            self.scheduler = BatchScheduler(
+                self.model,
+                max_batch_size=config.max_batch_size,
+                max_wait_ms=config.max_batch_wait_ms
+            )
+    
+    def resolution(self, value=None) -> Tuple[int, int]:
+        """Resolve a requested resolution, falling back to the configured one.
+        
+        Args:
+            value: Preset name, shortest edge in pixels, (shortest, longest)
+                tuple, or None for the model's resolution
+            
+        Returns:
+            Tuple of (shortest edge, longest edge)
+            
+        Raises:
+            ValueError: If value is not a valid resolution
+        """
+        if value is None:
+            return self.model.resolution
+        if isinstance(value, tuple):
+            return value
+        return resolve_resolution(value)
+    
+    def process_image(self, image_bytes: bytes, resolution=None, roi: RegionOfInterest = None) -> Dict:
         """Process image and return detection results.
         
         Args:
             image_bytes: Image data as bytes
+            resolution: Preset name, shortest edge or (shortest, longest)
+                tuple (default: configured model.image_size)
+            roi: Region of interest to limit detection to (default: whole frame)
             
         Returns:
             Dictionary containing detections and metadata
+            
+        Raises:
+            RoiError: If the region of interest lies outside the image or is too small
         """
         start_time = time.time()
+        resolution = self.resolution(resolution)
         
-        # Load image from bytes
-        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        
-        # Run detection
-        results = self.model.detect(image)
+        if self.cache is not None:
+            key = DetectionCache.make_key(
+                image_bytes,
+                f"{self.model.model_name}@{self.version}",
+                self.model.confidence_threshold,
+                resolution,
+                roi
+            )
+            results = self.cache.get_or_compute(key, lambda: self._detect(image_bytes, resolution, roi))
+        else:
+            results = self._detect(image_bytes, resolution, roi)
         
         # Calculate processing time
         processing_time = time.time() - start_time
@@ -43,6 +438,198 @@ class ObjectDetector:
         
         return results
     
+    def _detect(self, image_bytes: bytes, resolution: Tuple[int, int], roi: RegionOfInterest = None) -> Dict:
+        """Decode image bytes and run detection.
+        
+        Args:
+            image_bytes: Image data as bytes
+            resolution: (shortest edge, longest edge) to resize to
+            roi: Region of interest; only its bounding rectangle is decoded
+                and run through the model, at the scale of the whole frame
+            
+        Returns:
+            Dictionary containing detections and image size
+        """
+        # Load image from bytes, at reduced scale when it is much larger than the model input
+        with time_stage('decode'):
+            if roi is not None:
+                image, crop_box, full_size, resolution = decode_image_region(image_bytes, roi, *resolution)
+                original_size = (crop_box[2] - crop_box[0], crop_box[3] - crop_box[1])
+            else:
+                image, original_size = decode_image(image_bytes, *resolution)
+        
+        # Run detection; boxes are mapped back to the original resolution
+        if self.scheduler is not None:
+            results = self.scheduler.detect(image, original_size, resolution)
+        else:
+            results = self.model.detect(image, original_size, resolution)
+        results['resolution'] = list(resolution)
+        
+        if roi is not None:
+            results = self._apply_roi(results, roi, crop_box, full_size)
+        return results
+    
+    @staticmethod
+    def _apply_roi(
+        results: Dict,
+        roi: RegionOfInterest,
+        crop_box: Tuple[int, int, int, int],
+        full_size: Tuple[int, int]
+    ) -> Dict:
+        """Map results of an ROI crop to the full frame and drop detections outside the ROI.
+        
+        Args:
+            results: Detection results on the crop
+            roi: Region of interest
+            crop_box: (left, top, right, bottom) of the crop in the full frame
+            full_size: Full-frame size as (width, height)
+            
+        Returns:
+            Results with full-frame boxes and image size, and an "roi" entry
+        """
+        detections = roi.filter_detections(results['detections'], crop_box[:2])
+        return {
+            **results,
+            "detections": detections,
+            "num_detections": len(detections),
+            "image_size": list(full_size),
+            "roi": {"polygon": roi.to_list(), "crop": list(crop_box)}
+        }
+    
+    def iter_process_batch(
+        self,
+        items: List[Tuple[str, bytes]],
+        resolution=None,
+        roi: RegionOfInterest = None
+    ) -> Iterator[List[Tuple[int, Dict]]]:
+        """Decode several images and detect objects in shape-bucketed batches.
+        
+        Args:
+            items: List of (filename, image bytes) pairs
+            resolution: Preset name, shortest edge or (shortest, longest)
+                tuple (default: configured model.image_size)
+            roi: Region of interest applied to every image (default: whole frame)
+            
+        Yields:
+            One list of (position in items, result dictionary) pairs per
+            forward pass, as soon as it finishes; results of images that
+            could not be decoded come first. Each result has the filename and
+            either the detections or an error message.
+        """
+        start_time = time.time()
+        resolution = self.resolution(resolution)
+        
+        images = []
+        original_sizes = []
+        positions = []
+        crops = []
+        errors = []
+        # Image indices by inference resolution; ROI crops of differently
+        # sized frames are resized by different amounts
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for position, (filename, image_bytes) in enumerate(items):
+            try:
+                with time_stage('decode'):
+                    if roi is not None:
+                        image, crop_box, full_size, image_resolution = decode_image_region(
+                            image_bytes, roi, *resolution
+                        )
+                        original_size = (crop_box[2] - crop_box[0], crop_box[3] - crop_box[1])
+                        crops.append((crop_box, full_size))
+                    else:
+                        image, original_size = decode_image(image_bytes, *resolution)
+                        image_resolution = resolution
+            except RoiError as e:
+                errors.append((position, {"filename": filename, "error": str(e)}))
+                continue
+            except Exception as e:
+                errors.append((position, {"filename": filename, "error": f"Invalid image file: {str(e)}"}))
+                continue
+            groups.setdefault(image_resolution, []).append(len(images))
+            images.append(image)
+            original_sizes.append(original_size)
+            positions.append(position)
+        
+        if errors:
+            yield errors
+        
+        for group_resolution, members in groups.items():
+            batches = self.batcher.iter_detect(
+                [images[m] for m in members],
+                [original_sizes[m] for m in members],
+                group_resolution
+            )
+            for indices, results, report in batches:
+                processing_time = round(time.time() - start_time, 3)
+                indices = [members[i] for i in indices]
+                if roi is not None:
+                    results = [self._apply_roi(result, roi, *crops[i]) for i, result in zip(indices, results)]
+                yield [
+                    (positions[i], {
+                        "filename": items[positions[i]][0],
+                        **result,
+                        "resolution": list(group_resolution),
+                        "processing_time": processing_time,
+                        "batch": report
+                    })
+                    for i, result in zip(indices, results)
+                ]
+    
+    def process_batch(
+        self,
+        items: List[Tuple[str, bytes]],
+        resolution=None,
+        roi: RegionOfInterest = None
+    ) -> List[Dict]:
+        """Decode several images and detect objects in shape-bucketed batches.
+        
+        Args:
+            items: List of (filename, image bytes) pairs
+            resolution: Preset name, shortest edge or (shortest, longest)
+                tuple (default: configured model.image_size)
+            roi: Region of interest applied to every image (default: whole frame)
+            
+        Returns:
+            List of result dictionaries in the same order as items, each with
+            the filename and either the detections or an error message
+        """
+        outputs = [None] * len(items)
+        for batch in self.iter_process_batch(items, resolution, roi):
+            for position, output in batch:
+                outputs[position] = output
+        return outputs
+    
+    def warm_up(self, resolutions: List[Tuple[int, int]], iterations: int = 1) -> float:
+        """Run dummy forward passes so the first real request is not cold.
+        
+        Args:
+            resolutions: Image sizes to warm up, as (width, height)
+            iterations: Passes per resolution
+            
+        Returns:
+            Warmup time in seconds
+        """
+        start_time = time.time()
+        
+        for width, height in resolutions:
+            image = Image.new('RGB', (int(width), int(height)))
+            for _ in range(iterations):
+                self.model.detect(image)
+        
+        # Also warm the batched path at the largest batch size
+        if self.scheduler is not None and resolutions:
+            width, height = resolutions[0]
+            image = Image.new('RGB', (int(width), int(height)))
+            self.model.detect_batch([image] * self.scheduler.max_batch_size)
+        
+        return time.time() - start_time
+    
+    def shutdown(self):
+        """Stop the scheduler thread so the model can be freed."""
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+            self.scheduler = None
+    
     def process_image_file(self, image_path: str) -> Dict:
         """Process image from file path.
         
@@ -55,19 +642,290 @@ class ObjectDetector:
         with open(image_path, 'rb') as f:
             image_bytes = f.read()
         return self.process_image(image_bytes)
+    
+    def stats(self) -> Dict:
+        """Get inference statistics.
+        
+        Returns:
+            Dictionary with batching, bucketing and cache statistics (None when disabled)
+        """
+        return {
+            "batching": self.scheduler.stats() if self.scheduler is not None else None,
+            "bucketing": self.batcher.stats(),
+            "cache": self.cache.stats() if self.cache is not None else None
+        }
+
+
+# Global model registry (lazy loaded with the configured model)
+_registry = None
+_detector_lock = threading.Lock()
+
+# Global inference executor (lazy created)
+_executor = None
+
+# Model loading and warmup state, reported by the readiness probe
+_readiness = {"state": "not_started"}
+_ready = threading.Event()
+
+
+def _create_detector(source: str, version: str) -> ObjectDetector:
+    """Build a detector for a registry version.
+    
+    Args:
+        source: Checkpoint directory or model name (exported model directory
+            for the onnx backend)
+        version: Version label
+        
+    Returns:
+        ObjectDetector instance
+    """
+    if config.backend == 'onnx':
+        return ObjectDetector(onnx_path=source, version=version)
+    return ObjectDetector(model_name=source, version=version)
+
 
+def get_registry() -> ModelRegistry:
+    """Get or create the global model registry, loading the configured model.
+    
+    Returns:
+        ModelRegistry instance with at least the configured version loaded
+    """
+    global _registry
+    if _registry is None:
+        with _detector_lock:
+            if _registry is None:
+                registry = ModelRegistry(_create_detector, max_versions=config.max_model_versions)
+                source = config.onnx_path if config.backend == 'onnx' else config.model_name
+                registry.load(source, config.model_version)
+                _registry = registry
+    return _registry
+
+
+def loaded_registry() -> Optional[ModelRegistry]:
+    """Get the global model registry without loading it.
+    
+    Returns:
+        ModelRegistry instance, or None while the configured model is still loading
+    """
+    return _registry
 
-# Global detector instance (lazy loaded)
-_detector = None
 
+def active_model_version() -> Optional[str]:
+    """Get the active model version without loading the registry.
+    
+    Returns:
+        Version label, or None while the configured model is still loading
+    """
+    return _registry.active_version if _registry is not None else None
 
-def get_detector() -> ObjectDetector:
-    """Get or create global detector instance.
+
+def get_detector(version: str = None) -> ObjectDetector:
+    """Get the detector of a model version, loading the registry on first use.
     
+    Args:
+        version: Version label, or None for the active version
+        
     Returns:
         ObjectDetector instance
+        
+    Raises:
+        UnknownModelVersion: If the version is not loaded
+    """
+    return get_registry().get(version)
+
+
+def is_archive(filename: str, content_type: str = None) -> bool:
+    """Check whether an upload is a zip or tar archive.
+    
+    Args:
+        filename: Uploaded file name
+        content_type: Uploaded content type
+        
+    Returns:
+        True if the upload should be read as an archive of images
+    """
+    return (
+        (filename or '').lower().endswith(ARCHIVE_EXTENSIONS)
+        or content_type in ARCHIVE_CONTENT_TYPES
+    )
+
+
+def iter_archive_images(fileobj: BinaryIO, filename: str = '') -> Iterator[Tuple[str, bytes]]:
+    """Iterate over the images in a zip or tar archive, one member at a time.
+    
+    Args:
+        fileobj: Seekable binary file containing the archive
+        filename: Archive file name, used to tell zip from tar
+        
+    Yields:
+        (member name, image bytes) pairs for members with an image extension
+    """
+    fileobj.seek(0)
+    if filename.lower().endswith('.zip') or zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    yield info.filename, archive.read(info)
+        return
+    
+    fileobj.seek(0)
+    # Stream mode reads members sequentially without building an index
+    with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield member.name, archive.extractfile(member).read()
+
+
+def process_image_bytes(
+    image_bytes: bytes,
+    resolution=None,
+    model_version: str = None,
+    roi: RegionOfInterest = None
+) -> Dict:
+    """Process image bytes with the global detector.
+    
+    Loads the detector on first use, so this is meant to be run on the
+    inference executor rather than the event loop.
+    
+    Args:
+        image_bytes: Image data as bytes
+        resolution: Preset name, shortest edge or (shortest, longest) tuple
+            (default: configured model.image_size)
+        model_version: Version label to pin (default: the active version)
+        roi: Region of interest to limit detection to (default: whole frame)
+        
+    Returns:
+        Dictionary containing detections and metadata
+        
+    Raises:
+        UnknownModelVersion: If the pinned version is not loaded
+        RoiError: If the region of interest lies outside the image or is too small
+    """
+    registry = get_registry()
+    with registry.acquire(model_version) as detector:
+        results = detector.process_image(image_bytes, resolution, roi)
+    return {**results, "model_version": detector.version}
+
+
+def iter_process_batch(
+    items: List[Tuple[str, bytes]],
+    resolution=None,
+    model_version: str = None,
+    roi: RegionOfInterest = None
+) -> Iterator[List[Tuple[int, Dict]]]:
+    """Run ObjectDetector.iter_process_batch on a model version.
+    
+    The version is held from the first batch until the iterator is
+    exhausted or closed, so it is not freed halfway through an upload.
+    
+    Args:
+        items: List of (filename, image bytes) pairs
+        resolution: Preset name, shortest edge or (shortest, longest) tuple
+        model_version: Version label to pin (default: the active version)
+        roi: Region of interest applied to every image (default: whole frame)
+        
+    Yields:
+        One list of (position in items, result dictionary) pairs per forward pass
+        
+    Raises:
+        UnknownModelVersion: If the pinned version is not loaded
+    """
+    with get_registry().acquire(model_version) as detector:
+        for batch in detector.iter_process_batch(items, resolution, roi):
+            yield [
+                (position, {**result, "model_version": detector.version})
+                for position, result in batch
+            ]
+
+
+def get_executor() -> InferenceExecutor:
+    """Get or create global inference executor.
+    
+    Returns:
+        InferenceExecutor instance
+    """
+    global _executor
+    if _executor is None:
+        with _detector_lock:
+            if _executor is None:
+                _executor = InferenceExecutor(
+                    max_concurrency=config.max_concurrency,
+                    max_queue_size=config.max_queue_size
+                )
+    return _executor
+
+
+def warm_up_detector() -> Dict:
+    """Load the global detector and run the configured warmup passes.
+    
+    Blocks until done, so it is meant to run in a background thread at
+    startup. Readiness (see is_ready) is only signalled once it succeeds.
+    
+    Returns:
+        Readiness state with model load and warmup times
+    """
+    global _readiness
+    try:
+        _readiness = {"state": "loading"}
+        start_time = time.time()
+        detector = get_detector()
+        load_time = time.time() - start_time
+        
+        warmup_time = 0.0
+        if config.warmup_enabled:
+            _readiness = {"state": "warming_up", "load_time": round(load_time, 3)}
+            warmup_time = detector.warm_up(
+                config.warmup_resolutions,
+                iterations=config.warmup_iterations
+            )
+        
+        _readiness = {
+            "state": "ready",
+            "load_time": round(load_time, 3),
+            "warmup_time": round(warmup_time, 3)
+        }
+        _ready.set()
+    except Exception as e:
+        _readiness = {"state": "failed", "error": str(e)}
+    
+    return dict(_readiness)
+
+
+def is_ready() -> bool:
+    """Check whether the model is loaded and warmed up.
+    
+    Returns:
+        True once warm_up_detector has completed successfully
+    """
+    return _ready.is_set()
+
+
+def readiness() -> Dict:
+    """Get the model loading and warmup state.
+    
+    Returns:
+        Dictionary with the state ("not_started", "loading", "warming_up",
+        "ready" or "failed") and timings
+    """
+    return dict(_readiness)
+
+
+def reinit_after_fork():
+    """Reset thread-backed state in a forked worker process.
+    
+    The detector's weights are inherited from the parent (see
+    backend/prefork.py), but its scheduler thread, the executor's worker
+    threads and any held locks are not usable in the child. Called by the
+    worker right after fork(); other forks (multiprocessing, subprocess
+    helpers) never serve requests and are left alone.
     """
-    global _detector
-    if _detector is None:
-        _detector = ObjectDetector()
-    return _detector
+    global _detector_lock, _executor, _ready, _readiness
+    _detector_lock = threading.Lock()
+    _executor = None
+    _ready = threading.Event()
+    _readiness = {"state": "not_started"}
+    if _registry is not None:
+        _registry.reset_lock()
+        for detector in _registry.loaded():
+            detector.start_scheduler()
@@ -1,22 +1,65 @@
 """FastAPI backend for TEDR object detection system."""
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Header, Query, UploadFile, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
 from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from itertools import islice
 import sys
+import os
+import hmac
+import asyncio
+import threading
 
 # Add parent directory to path to import modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.config import config
-from backend.inference import get_detector
+from backend.inference import (
+    QueueFullError,
+    active_model_version,
+    get_detector,
+    get_executor,
+    get_registry,
+    is_archive,
+    is_ready,
+    iter_archive_images,
+    iter_process_batch,
+    loaded_registry,
+    process_image_bytes,
+    readiness,
+    warm_up_detector
+)
+from backend.registry import UnknownModelVersion
+from models.detr_model import RESOLUTION_PRESETS, resolve_resolution
+from utils.memory import process_memory
+from utils.encoding import dumps_json, encode_results
+from utils.metrics import REQUESTS_IN_PROGRESS, record_request, render_metrics, time_stage
+from utils.roi import RegionOfInterest, RoiError
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up the model in the background at startup.
+    
+    The server starts accepting connections immediately so /health stays
+    responsive; /ready only succeeds once warmup has finished.
+    """
+    warmup_task = asyncio.create_task(run_in_threadpool(warm_up_detector))
+    yield
+    if not warmup_task.done():
+        warmup_task.cancel()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="TEDR - Object Detection API",
     description="Transformer-based Object Detection for Indian Roads",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -28,6 +71,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints counted in the request metrics
+DETECTION_ENDPOINTS = ("/detect", "/detect/batch")
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count detection requests by endpoint and status."""
+    path = request.url.path
+    if path not in DETECTION_ENDPOINTS:
+        return await call_next(request)
+    
+    REQUESTS_IN_PROGRESS.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        record_request(path, 500)
+        raise
+    finally:
+        REQUESTS_IN_PROGRESS.dec()
+    record_request(path, response.status_code)
+    return response
+
+
 # Mount frontend static files
 frontend_path = Path(__file__).parent.parent / "frontend"
 if frontend_path.exists():
@@ -42,7 +108,12 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "detect": "/detect (POST)",
+            "detect_batch": "/detect/batch (POST)",
+            "detect_stream": "/detect/stream (WebSocket)",
+            "stats": "/stats",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -52,26 +123,108 @@ async def root():
 async def health_check():
     """Health check endpoint.
     
+    Reports that the process is alive; use /ready to check whether the
+    model is loaded and warmed up.
+    
     Returns:
         Health status of the API
     """
     return {
         "status": "healthy",
+        "ready": is_ready(),
         "model": config.model_name,
         "device": config.device,
-        "confidence_threshold": config.confidence_threshold
+        "confidence_threshold": config.confidence_threshold,
+        "queue": get_executor().stats()
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe endpoint.
+    
+    Returns:
+        200 once the model is loaded and warmed up, 503 before that
+    """
+    state = readiness()
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"ready": False, **state})
+    return {"ready": True, **state}
+
+
+def _parse_resolution(value: Optional[str]):
+    """Validate a requested resolution.
+    
+    Args:
+        value: Preset name, shortest edge in pixels, or None
+        
+    Returns:
+        Tuple of (shortest edge, longest edge), or None for the configured default
+        
+    Raises:
+        HTTPException: 400 if value is not a valid resolution
+    """
+    if value is None:
+        return None
+    try:
+        return resolve_resolution(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _parse_roi(roi: Optional[str], camera: Optional[str]):
+    """Resolve the region of interest of a request.
+    
+    Args:
+        roi: Region as JSON ({"polygon": ...}, {"rect": ...}, a list of
+            points) or "x1,y1,x2,y2", or None
+        camera: Name of a camera configured under roi.cameras, or None;
+            an explicit roi takes precedence
+        
+    Returns:
+        RegionOfInterest, or None for the whole frame
+        
+    Raises:
+        HTTPException: 400 if the region is invalid, 404 if the camera is unknown
+    """
+    if roi is None and camera is None:
+        return None
+    if roi is None:
+        cameras = config.roi_cameras
+        if camera not in cameras:
+            raise HTTPException(status_code=404, detail=f"No region of interest configured for camera '{camera}'")
+        roi = cameras[camera]
+    try:
+        return RegionOfInterest.parse(roi)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/detect")
-async def detect_objects(file: UploadFile = File(...)):
+async def detect_objects(
+    file: UploadFile = File(...),
+    accept: Optional[str] = Header(None),
+    resolution: Optional[str] = Query(None),
+    model_version: Optional[str] = Query(None),
+    roi: Optional[str] = Query(None),
+    camera: Optional[str] = Query(None)
+):
     """Detect objects in uploaded image.
     
     Args:
         file: Uploaded image file (JPEG, PNG)
+        accept: Accept header; "application/x-tedr-detections" selects the
+            packed binary format, anything else gets JSON
+        resolution: Inference resolution for this request: "fast",
+            "balanced", "accurate" or a shortest edge in pixels
+            (default: model.image_size)
+        model_version: Model version to use (default: the active version)
+        roi: Region of interest in full-frame pixels, as JSON polygon/rect
+            or "x1,y1,x2,y2" (default: the camera's region, or the whole frame)
+        camera: Camera whose configured region of interest to use
         
     Returns:
-        JSON response with detection results
+        JSON (or packed binary) response with detection results
     """
     # Validate file type
     if not file.content_type.startswith("image/"):
@@ -79,17 +232,31 @@ async def detect_objects(file: UploadFile = File(...)):
             status_code=400,
             detail=f"Invalid file type: {file.content_type}. Please upload an image file."
         )
+    resolution = _parse_resolution(resolution)
+    roi = _parse_roi(roi, camera)
     
     try:
         # Read image bytes
         image_bytes = await file.read()
         
-        # Get detector and process image
-        detector = get_detector()
-        results = detector.process_image(image_bytes)
+        # Decode and detect on the inference executor, keeping the event
+        # loop free and letting concurrent requests be micro-batched
+        results = await get_executor().run(process_image_bytes, image_bytes, resolution, model_version, roi)
         
-        return JSONResponse(content=results)
+        with time_stage('serialize'):
+            body, media_type = encode_results(results, accept)
+        return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
         
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RoiError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {str(e)}. Please retry later.",
+            headers={"Retry-After": str(config.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -97,6 +264,391 @@ async def detect_objects(file: UploadFile = File(...)):
         )
 
 
+@app.post("/detect/batch")
+async def detect_objects_batch(
+    files: List[UploadFile] = File(...),
+    resolution: Optional[str] = Query(None),
+    model_version: Optional[str] = Query(None),
+    roi: Optional[str] = Query(None),
+    camera: Optional[str] = Query(None)
+):
+    """Detect objects in many images, streaming results as NDJSON.
+    
+    Accepts either several image files or a single zip/tar archive of
+    images. Images are run through the model in batches of max_batch_size
+    and one JSON line is streamed back per image as soon as its batch
+    finishes, so results are never all held in memory.
+    
+    Args:
+        files: Uploaded image files, or one zip/tar archive
+        resolution: Inference resolution for all images: "fast",
+            "balanced", "accurate" or a shortest edge in pixels
+            (default: model.image_size)
+        model_version: Model version to use for all images (default: the
+            active version)
+        roi: Region of interest for all images (see /detect)
+        camera: Camera whose configured region of interest to use
+        
+    Returns:
+        Streaming NDJSON response with one result object per image
+    """
+    resolution = _parse_resolution(resolution)
+    roi = _parse_roi(roi, camera)
+    if model_version is not None:
+        try:
+            await run_in_threadpool(get_detector, model_version)
+        except UnknownModelVersion as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    
+    if len(files) == 1 and is_archive(files[0].filename, files[0].content_type):
+        archive = files[0]
+        items = iter_archive_images(archive.file, archive.filename)
+    else:
+        items = _iter_uploads(files)
+    
+    return StreamingResponse(
+        _stream_batch_results(items, resolution, model_version, roi),
+        media_type="application/x-ndjson"
+    )
+
+
+def _iter_uploads(files: List[UploadFile]):
+    """Read uploaded files one at a time (blocking I/O).
+    
+    Args:
+        files: Uploaded files
+        
+    Yields:
+        (filename, image bytes) pairs, or (filename, error message) for
+        files that are not images
+    """
+    for f in files:
+        if not (f.content_type or "").startswith("image/"):
+            yield f.filename, f"Invalid file type: {f.content_type}. Please upload an image file."
+        else:
+            yield f.filename, f.file.read()
+
+
+async def _stream_batch_results(items, resolution=None, model_version=None, roi=None):
+    """Run (filename, bytes) items through the model in windows and yield NDJSON lines.
+    
+    Each window of uploads is grouped into shape buckets, so lines of one
+    window can arrive out of upload order; every line carries its "index".
+    
+    Args:
+        items: Iterator of (filename, image bytes or error message) pairs
+        resolution: (shortest edge, longest edge), or None for the default
+        model_version: Model version label, or None for the active version
+        roi: RegionOfInterest, or None for the whole frame
+        
+    Yields:
+        One JSON line per image
+    """
+    executor = get_executor()
+    window = config.bucket_window if config.bucketing_enabled else config.max_batch_size
+    index = 0
+    
+    while True:
+        try:
+            chunk = await run_in_threadpool(
+                lambda: list(islice(items, window))
+            )
+        except Exception as e:
+            yield dumps_json({"index": index, "error": f"Error reading upload: {str(e)}"}) + b"\n"
+            return
+        if not chunk:
+            return
+        
+        # Items whose content is an error message are reported without inference
+        valid_indices = []
+        valid = []
+        for offset, (filename, data) in enumerate(chunk):
+            if isinstance(data, bytes):
+                valid_indices.append(index + offset)
+                valid.append((filename, data))
+            else:
+                with time_stage('serialize'):
+                    line = dumps_json({"index": index + offset, "filename": filename, "error": data}) + b"\n"
+                yield line
+        
+        # Run one forward pass per executor call, emitting results as each finishes
+        batches = iter_process_batch(valid, resolution, model_version, roi) if valid else iter(())
+        remaining = set(range(len(valid)))
+        while True:
+            try:
+                batch = await executor.run(next, batches, None)
+            except QueueFullError:
+                # Batch clients wait for capacity instead of failing
+                await asyncio.sleep(config.retry_after)
+                continue
+            except Exception as e:
+                batch = None
+                for position in sorted(remaining):
+                    with time_stage('serialize'):
+                        line = dumps_json({
+                            "index": valid_indices[position],
+                            "filename": valid[position][0],
+                            "error": f"Error processing image: {str(e)}"
+                        }) + b"\n"
+                    yield line
+            if batch is None:
+                break
+            
+            for position, result in batch:
+                remaining.discard(position)
+                with time_stage('serialize'):
+                    line = dumps_json({"index": valid_indices[position], **result}) + b"\n"
+                yield line
+        
+        index += len(chunk)
+
+
+@app.websocket("/detect/stream")
+async def detect_stream(websocket: WebSocket):
+    """Stream detections for a live sequence of video frames.
+    
+    The client sends each encoded frame (JPEG, PNG) as a binary message and
+    receives one JSON message per frame, tagged with the frame's sequence
+    number ("frame_id", counted from 0). Up to stream_max_in_flight frames
+    are processed at once, so replies may arrive out of order. When the
+    client sends frames faster than they can be processed, only the newest
+    waiting frame is kept and older ones are answered with
+    {"frame_id": ..., "dropped": true}. The optional "resolution",
+    "model_version", "roi" and "camera" query parameters apply to the
+    whole stream.
+    
+    Args:
+        websocket: WebSocket connection
+    """
+    await websocket.accept()
+    
+    try:
+        resolution = _parse_resolution(websocket.query_params.get("resolution"))
+        model_version = websocket.query_params.get("model_version")
+        roi = _parse_roi(websocket.query_params.get("roi"), websocket.query_params.get("camera"))
+    except HTTPException as e:
+        await websocket.send_text(dumps_json({"error": e.detail}).decode("utf-8"))
+        await websocket.close(code=1008)
+        return
+    
+    executor = get_executor()
+    max_in_flight = config.stream_max_in_flight
+    in_flight = set()
+    pending = None  # Newest frame waiting for a free slot: (frame_id, bytes)
+    send_lock = asyncio.Lock()
+    
+    async def send(message: dict):
+        async with send_lock:
+            try:
+                await websocket.send_text(dumps_json(message).decode("utf-8"))
+            except Exception:
+                pass  # Client went away
+    
+    async def run_frame(frame_id: int, image_bytes: bytes):
+        try:
+            results = await executor.run(process_image_bytes, image_bytes, resolution, model_version, roi)
+            await send({"frame_id": frame_id, **results})
+        except QueueFullError:
+            await send({"frame_id": frame_id, "dropped": True, "reason": "server busy"})
+        except Exception as e:
+            await send({"frame_id": frame_id, "error": f"Error processing frame: {str(e)}"})
+    
+    def launch(frame_id: int, image_bytes: bytes):
+        task = asyncio.create_task(run_frame(frame_id, image_bytes))
+        in_flight.add(task)
+        task.add_done_callback(on_frame_done)
+    
+    def on_frame_done(task):
+        nonlocal pending
+        in_flight.discard(task)
+        if pending is not None and len(in_flight) < max_in_flight:
+            frame_id, image_bytes = pending
+            pending = None
+            launch(frame_id, image_bytes)
+    
+    frame_id = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            image_bytes = message.get("bytes")
+            if not image_bytes:
+                await send({"frame_id": frame_id, "error": "Frames must be sent as binary messages"})
+                frame_id += 1
+                continue
+            
+            if len(in_flight) < max_in_flight:
+                launch(frame_id, image_bytes)
+            else:
+                # Client is ahead of us: keep only the newest frame
+                if pending is not None:
+                    await send({"frame_id": pending[0], "dropped": True, "reason": "stale"})
+                pending = (frame_id, image_bytes)
+            frame_id += 1
+    finally:
+        for task in list(in_flight):
+            task.cancel()
+
+
+@app.get("/stats")
+async def inference_stats():
+    """Inference statistics endpoint.
+    
+    Returns:
+        Executor load, batch-fill statistics and memory usage of this worker;
+        model statistics are omitted (model "not_loaded") until the
+        configured model has finished loading
+    """
+    stats = {"queue": get_executor().stats()}
+    
+    # Never load the model here: that would block the event loop
+    registry = loaded_registry()
+    if registry is None:
+        stats["model"] = "not_loaded"
+    else:
+        stats.update(registry.get().stats())
+        stats["model_versions"] = registry.versions()
+    
+    stats["process"] = {"pid": os.getpid(), **process_memory()}
+    return stats
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint.
+    
+    Returns:
+        Per-stage latency histograms, request/error/detection counters,
+        queue depth and model load time in the Prometheus text format
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+class LoadModelRequest(BaseModel):
+    """Body of POST /models/load."""
+    
+    model_name: str
+    version: str
+    activate: bool = True
+
+
+def _check_admin(token: Optional[str]):
+    """Reject model management calls without the configured admin token.
+    
+    Args:
+        token: X-Admin-Token header value
+        
+    Raises:
+        HTTPException: 403 if management is disabled, 401 if the token is wrong
+    """
+    if not config.admin_token:
+        raise HTTPException(status_code=403, detail="Model management is disabled (set api.admin_token)")
+    if not token or not hmac.compare_digest(token, str(config.admin_token)):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def _load_model_version(request: LoadModelRequest):
+    """Load a model version into the registry (runs on a background thread)."""
+    try:
+        get_registry().load(
+            request.model_name,
+            request.version,
+            activate=request.activate,
+            warmup_resolutions=config.warmup_resolutions if config.warmup_enabled else None,
+            warmup_iterations=config.warmup_iterations
+        )
+        print(f"Model version {request.version} ready ({request.model_name})")
+    except Exception as e:
+        print(f"Failed to load model version {request.version}: {e}")
+
+
+@app.get("/models")
+async def list_models():
+    """List loaded model versions.
+    
+    Returns:
+        Versions with their state, in-flight requests and which one is active
+    """
+    registry = await run_in_threadpool(get_registry)
+    return {"active_version": registry.active_version, "versions": registry.versions()}
+
+
+@app.post("/models/load", status_code=202)
+async def load_model(request: LoadModelRequest, x_admin_token: Optional[str] = Header(None)):
+    """Load, warm up and (by default) activate a new model version in the background.
+    
+    Requests keep being served by the active version while the new one
+    loads; poll GET /models until its state is "ready".
+    
+    Args:
+        request: Checkpoint directory (exported directory for the onnx
+            backend), version label and whether to activate it
+        x_admin_token: Admin token
+        
+    Returns:
+        The version being loaded
+    """
+    _check_admin(x_admin_token)
+    registry = await run_in_threadpool(get_registry)
+    if any(v["version"] == request.version and v["state"] in ("loading", "ready") for v in registry.versions()):
+        raise HTTPException(status_code=409, detail=f"Model version '{request.version}' already exists")
+    
+    threading.Thread(
+        target=_load_model_version,
+        args=(request,),
+        name=f"tedr-load-{request.version}",
+        daemon=True
+    ).start()
+    return {"version": request.version, "state": "loading"}
+
+
+@app.post("/models/{version}/activate")
+async def activate_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Route requests without a pinned version to a loaded version.
+    
+    Args:
+        version: Version label
+        x_admin_token: Admin token
+        
+    Returns:
+        The active version
+    """
+    _check_admin(x_admin_token)
+    registry = await run_in_threadpool(get_registry)
+    try:
+        registry.activate(version)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"active_version": version}
+
+
+@app.delete("/models/{version}")
+async def unload_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Unload a model version once its in-flight requests have finished.
+    
+    Args:
+        version: Version label (must not be the active version)
+        x_admin_token: Admin token
+        
+    Returns:
+        The version's state ("draining" or "unloaded")
+    """
+    _check_admin(x_admin_token)
+    registry = await run_in_threadpool(get_registry)
+    try:
+        await run_in_threadpool(registry.unload, version)
+    except UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    state = next((v["state"] for v in registry.versions() if v["version"] == version), "unloaded")
+    return {"version": version, "state": state}
+
+
 @app.get("/models/info")
 async def model_info():
     """Get information about the loaded model.
@@ -106,9 +658,14 @@ async def model_info():
     """
     return {
         "model_name": config.model_name,
+        "active_version": active_model_version(),
         "confidence_threshold": config.confidence_threshold,
         "image_size": config.image_size,
+        "resolution": list(resolve_resolution(config.image_size, config.max_image_size)),
+        "resolution_presets": RESOLUTION_PRESETS,
         "device": config.device,
+        "backend": config.backend,
+        "precision": config.precision,
         "num_classes": 91,  # COCO dataset classes
         "supported_objects": [
             "person", "bicycle", "car", "motorcycle", "bus", "truck",
@@ -0,0 +1,216 @@
+"""Multi-process serving for the TEDR FastAPI backend.
+
+Loads the DETR model once in the parent process, moves its weights into
+shared memory and forks uvicorn workers that all accept connections on one
+listening socket. Workers inherit the loaded model, so none of them pays the
+load cost and the weights exist once in physical memory however many workers
+are running.
+
+Usage:
+    python backend/prefork.py --workers 4
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+from pathlib import Path
+from typing import Dict
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+import uvicorn
+
+from backend.config import config
+from backend.inference import get_detector, reinit_after_fork
+from utils.memory import share_model_weights, process_memory, memory_report
+
+
+def preload_model() -> int:
+    """Load the global detector and move its weights into shared memory.
+    
+    Must run in the parent before any worker is forked. No forward pass is
+    run here: OpenMP thread pools started before fork() can deadlock in the
+    children.
+    
+    Returns:
+        Number of bytes of weights placed in shared memory
+    """
+    detector = get_detector()
+    return share_model_weights(detector.model.model)
+
+
+def _run_worker(sock: socket.socket, num_threads: int):
+    """Serve the FastAPI app on an inherited socket (runs in the child).
+    
+    Args:
+        sock: Listening socket created by the parent
+        num_threads: Number of intra-op threads for this worker
+    """
+    # Split the cores between workers instead of oversubscribing them
+    torch.set_num_threads(num_threads)
+    
+    from backend.main import app
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+    server.run(sockets=[sock])
+
+
+def _spawn_worker(sock: socket.socket, num_threads: int) -> int:
+    """Fork a worker process.
+    
+    Args:
+        sock: Listening socket shared by all workers
+        num_threads: Number of intra-op threads for the worker
+        
+    Returns:
+        PID of the new worker
+    """
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            reinit_after_fork()
+            _run_worker(sock, num_threads)
+        except BaseException:
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def check_worker_memory(pids: list, weights_mb: float) -> Dict[int, Dict[str, float]]:
+    """Print a per-worker memory table and warn about unshared weights.
+    
+    With shared weights every worker maps the model's pages as shared
+    memory and its private memory holds only activations and interpreter
+    state, so it does not grow with the number of workers. A worker mapping
+    less shared memory than the model size has replaced the weights with a
+    private copy.
+    
+    Args:
+        pids: Worker process IDs
+        weights_mb: Size of the shared model weights in MB
+        
+    Returns:
+        Dictionary mapping PID to its memory usage
+    """
+    print(memory_report(pids))
+    
+    usage = {pid: process_memory(pid) for pid in pids}
+    for pid, mem in usage.items():
+        if mem and mem['shared_mb'] < weights_mb:
+            print(
+                f"WARNING: worker {pid} maps only {mem['shared_mb']} MB of shared memory, "
+                f"less than the {weights_mb:.1f} MB model; weights are not shared"
+            )
+    return usage
+
+
+def serve(
+    workers: int = None,
+    host: str = None,
+    port: int = None,
+    memory_check_interval: float = 60.0
+):
+    """Load the model once and run forked uvicorn workers.
+    
+    Dead workers are restarted. SIGINT/SIGTERM stop all workers.
+    
+    Args:
+        workers: Number of worker processes (default: from config)
+        host: Host to bind (default: from config)
+        port: Port to bind (default: from config)
+        memory_check_interval: Seconds between worker memory reports (0 to disable)
+    """
+    workers = workers or config.api_workers
+    host = host or config.api_host
+    port = port or config.api_port
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    
+    # Bind once in the parent; every worker accepts on the same socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    
+    print(f"Loading model once in parent process {os.getpid()}...")
+    start_time = time.time()
+    weights_bytes = preload_model()
+    weights_mb = weights_bytes / (1024 * 1024)
+    print(f"Model loaded in {time.time() - start_time:.1f}s, "
+          f"{weights_mb:.1f} MB of weights in shared memory")
+    
+    # Import the app before forking so workers inherit it too
+    import backend.main  # noqa: F401
+    
+    pids = [_spawn_worker(sock, num_threads) for _ in range(workers)]
+    print(f"Started {workers} workers on http://{host}:{port} "
+          f"({num_threads} threads each): {pids}")
+    
+    stopping = False
+    
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+    
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    
+    next_check = time.time() + min(memory_check_interval, 10.0)
+    while not stopping:
+        # Restart workers that died
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in pids:
+            print(f"Worker {pid} exited with status {status}, restarting")
+            pids[pids.index(pid)] = _spawn_worker(sock, num_threads)
+        
+        if memory_check_interval > 0 and time.time() >= next_check:
+            check_worker_memory(pids, weights_mb)
+            next_check = time.time() + memory_check_interval
+        
+        time.sleep(0.5)
+    
+    print("Stopping workers...")
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in pids:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the TEDR API from forked workers sharing one copy of the model"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: api.workers from config.yaml)"
+    )
+    parser.add_argument("--host", type=str, default=None, help="Host to bind")
+    parser.add_argument("--port", type=int, default=None, help="Port to bind")
+    parser.add_argument(
+        "--memory-check-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between per-worker memory reports (0 to disable)"
+    )
+    
+    args = parser.parse_args()
+    serve(args.workers, args.host, args.port, args.memory_check_interval)
@@ -0,0 +1,289 @@
+"""Hot-swappable registry of loaded model versions for TEDR."""
+import gc
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import torch
+
+
+class UnknownModelVersion(Exception):
+    """Raised when a request pins a model version that is not being served."""
+
+
+class ModelVersion:
+    """One loaded model version and the requests currently using it."""
+    
+    def __init__(self, version: str, model_name: str):
+        """Initialize version entry.
+        
+        Args:
+            version: Version label requests can pin
+            model_name: Model name or checkpoint directory it was loaded from
+        """
+        self.version = version
+        self.model_name = model_name
+        self.detector = None
+        self.state = "loading"
+        self.error = None
+        self.in_flight = 0
+        self.load_time = None
+        self.loaded_at = None
+    
+    def info(self) -> Dict:
+        """Describe the version.
+        
+        Returns:
+            Dictionary with the version's source, state and in-flight requests
+        """
+        return {
+            "version": self.version,
+            "model_name": self.model_name,
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "load_time": self.load_time,
+            "loaded_at": self.loaded_at,
+            "error": self.error
+        }
+
+
+class ModelRegistry:
+    """Serve several model versions and switch the default one atomically.
+    
+    New versions are loaded and warmed up on the caller's thread while the
+    active version keeps serving; the switch itself is a pointer swap under
+    a lock, so no request is dropped or stalled by a rollout. Requests
+    hold a reference to the version they started on (see acquire), and a
+    version that is unloaded or evicted is only freed once its last
+    request has finished.
+    """
+    
+    def __init__(self, factory: Callable[[str, str], object], max_versions: int = 2):
+        """Initialize registry.
+        
+        Args:
+            factory: Callable (model_name, version) -> detector; the detector
+                needs warm_up(resolutions, iterations) and shutdown()
+            max_versions: Versions kept loaded; loading one more unloads the
+                oldest version that is not active
+        """
+        self.factory = factory
+        self.max_versions = max(1, int(max_versions))
+        
+        self._lock = threading.Lock()
+        self._versions: Dict[str, ModelVersion] = {}
+        self._active: Optional[str] = None
+    
+    @property
+    def active_version(self) -> Optional[str]:
+        """Get the version serving requests that do not pin one."""
+        return self._active
+    
+    def load(
+        self,
+        model_name: str,
+        version: str,
+        activate: bool = True,
+        warmup_resolutions: List = None,
+        warmup_iterations: int = 1
+    ) -> ModelVersion:
+        """Load and warm up a model version, then publish it.
+        
+        Blocks until the version is ready, so it is meant to run on a
+        background thread. Requests keep going to the active version
+        until the switch.
+        
+        Args:
+            model_name: Model name or checkpoint directory
+            version: Version label; must not already be loaded
+            activate: Make it the default version once ready
+            warmup_resolutions: Image sizes (width, height) to warm up
+            warmup_iterations: Warmup passes per resolution
+            
+        Returns:
+            The loaded version
+            
+        Raises:
+            ValueError: If the version is already loaded or loading
+        """
+        with self._lock:
+            existing = self._versions.get(version)
+            if existing is not None and existing.state in ("loading", "ready"):
+                raise ValueError(f"Model version '{version}' is already {existing.state}")
+            entry = ModelVersion(version, model_name)
+            self._versions[version] = entry
+        
+        start_time = time.time()
+        try:
+            detector = self.factory(model_name, version)
+            if warmup_resolutions:
+                detector.warm_up(warmup_resolutions, iterations=warmup_iterations)
+        except Exception as e:
+            # Failed versions are not kept, so the label can be loaded again
+            with self._lock:
+                entry.state = "failed"
+                entry.error = str(e)
+                self._remove_locked(entry)
+            raise
+        
+        with self._lock:
+            entry.detector = detector
+            entry.state = "ready"
+            entry.load_time = round(time.time() - start_time, 3)
+            entry.loaded_at = time.time()
+            if activate or self._active is None:
+                self._active = version
+            evicted = self._evict_locked()
+        
+        for old in evicted:
+            self._free(old)
+        return entry
+    
+    def activate(self, version: str):
+        """Make a loaded version the default one.
+        
+        Args:
+            version: Version label
+            
+        Raises:
+            UnknownModelVersion: If the version is not ready
+        """
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None or entry.state != "ready":
+                raise UnknownModelVersion(f"Model version '{version}' is not loaded")
+            self._active = version
+    
+    def unload(self, version: str):
+        """Stop routing requests to a version and free it once they drain.
+        
+        Args:
+            version: Version label
+            
+        Raises:
+            UnknownModelVersion: If the version is not ready
+            ValueError: If it is the active version
+        """
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None or entry.state != "ready":
+                raise UnknownModelVersion(f"Model version '{version}' is not loaded")
+            if version == self._active:
+                raise ValueError(f"Model version '{version}' is active; activate another version first")
+            free_now = self._retire_locked(entry)
+        
+        if free_now:
+            self._free(entry)
+    
+    @contextmanager
+    def acquire(self, version: str = None) -> Iterator[object]:
+        """Use a version's detector for the duration of a request.
+        
+        Args:
+            version: Version label to pin, or None for the active version
+            
+        Yields:
+            Detector of the version
+            
+        Raises:
+            UnknownModelVersion: If the version is not being served
+        """
+        with self._lock:
+            entry = self._versions.get(version or self._active)
+            if entry is None or entry.state != "ready":
+                raise UnknownModelVersion(f"Model version '{version or self._active}' is not loaded")
+            entry.in_flight += 1
+        
+        try:
+            yield entry.detector
+        finally:
+            with self._lock:
+                entry.in_flight -= 1
+                free_now = entry.state == "draining" and entry.in_flight == 0
+                if free_now:
+                    entry.state = "unloaded"
+                    self._remove_locked(entry)
+            if free_now:
+                self._free(entry)
+    
+    def get(self, version: str = None):
+        """Get a version's detector without holding a reference.
+        
+        Args:
+            version: Version label, or None for the active version
+            
+        Returns:
+            Detector of the version
+            
+        Raises:
+            UnknownModelVersion: If the version is not being served
+        """
+        with self.acquire(version) as detector:
+            return detector
+    
+    def loaded(self) -> List[object]:
+        """Get the detectors of all ready versions."""
+        with self._lock:
+            return [entry.detector for entry in self._versions.values() if entry.state == "ready"]
+    
+    def versions(self) -> List[Dict]:
+        """Describe all known versions.
+        
+        Returns:
+            List of version dictionaries, with "active" set on the default one
+        """
+        with self._lock:
+            return [
+                {**entry.info(), "active": entry.version == self._active}
+                for entry in self._versions.values()
+            ]
+    
+    def reset_lock(self):
+        """Replace the lock after fork(), since the parent's may be held."""
+        self._lock = threading.Lock()
+    
+    def _evict_locked(self) -> List[ModelVersion]:
+        """Retire the oldest inactive versions beyond max_versions (lock held).
+        
+        Returns:
+            Retired versions without requests in flight, to be freed
+        """
+        ready = sorted(
+            (entry for entry in self._versions.values() if entry.state == "ready"),
+            key=lambda entry: entry.loaded_at
+        )
+        to_free = []
+        for entry in ready[:max(0, len(ready) - self.max_versions)]:
+            if entry.version != self._active and self._retire_locked(entry):
+                to_free.append(entry)
+        return to_free
+    
+    def _retire_locked(self, entry: ModelVersion) -> bool:
+        """Stop routing requests to a version (lock held).
+        
+        Returns:
+            True if no request is using it and it can be freed now
+        """
+        if entry.in_flight == 0:
+            entry.state = "unloaded"
+            self._remove_locked(entry)
+            return True
+        entry.state = "draining"
+        return False
+    
+    def _remove_locked(self, entry: ModelVersion):
+        """Drop an unloaded or failed version from the table (lock held)."""
+        if self._versions.get(entry.version) is entry:
+            del self._versions[entry.version]
+    
+    def _free(self, entry: ModelVersion):
+        """Release a retired version's detector and its memory."""
+        detector, entry.detector = entry.detector, None
+        if detector is not None:
+            detector.shutdown()
+        del detector
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print(f"Unloaded model version {entry.version} ({entry.model_name})")
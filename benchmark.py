@@ -0,0 +1,744 @@
+"""
+Throughput benchmarks for TEDR inference.
+
+Usage:
+    python benchmark.py batch --num-images 16 --batch-sizes 1 2 4 8
+    python benchmark.py bucket --num-images 16 --batch-size 4
+    python benchmark.py --image-dir data/sample_images precision --precisions int8 bf16 fp16
+    python benchmark.py backend --onnx-path ./exported/detr-onnx
+    python benchmark.py --image-dir data/sample_images resolution
+    python benchmark.py nms --counts 100 1000 10000
+    python benchmark.py --image-dir data/sample_images early-exit --margins 0.05 0.1 0.2
+    python benchmark.py --model facebook/detr-resnet-50 startup --prepared ./prepared/detr-resnet-50
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import argparse
+import numpy as np
+import torch
+from PIL import Image
+
+
+# Mix of common camera/video resolutions (width, height)
+DEFAULT_SIZES = [(1280, 720), (640, 480), (1024, 768), (800, 600)]
+
+# Landscape dashcam frames interleaved with portrait phone photos
+MIXED_ORIENTATION_SIZES = [(1280, 720), (1080, 1920), (1920, 1080), (768, 1024)]
+
+
+def load_images(image_dir: str = None, num_images: int = 16, sizes=None, seed: int = 0):
+    """
+    Load benchmark images from a directory, or generate synthetic ones.
+    
+    Args:
+        image_dir: Directory of images (default: generate random images)
+        num_images: Number of images to load or generate
+        sizes: (width, height) of synthetic images, cycled (default: DEFAULT_SIZES)
+        seed: Random seed for synthetic images
+        
+    Returns:
+        List of RGB PIL Images
+    """
+    if image_dir:
+        paths = sorted(
+            p for p in Path(image_dir).iterdir()
+            if p.suffix.lower() in {'.jpg', '.jpeg', '.png', '.webp', '.bmp'}
+        )[:num_images]
+        return [Image.open(p).convert('RGB') for p in paths]
+    
+    sizes = sizes or DEFAULT_SIZES
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(num_images):
+        width, height = sizes[i % len(sizes)]
+        pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        images.append(Image.fromarray(pixels))
+    return images
+
+
+def parse_size(value: str):
+    """Parse a WIDTHxHEIGHT command-line value into a (width, height) tuple."""
+    try:
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+
+
+def max_box_difference(results_a, results_b, key='bbox', score_key='confidence'):
+    """
+    Compare two lists of per-image results.
+    
+    Args:
+        results_a: Results of one code path
+        results_b: Results of another code path, same images and order
+        key: Box field name in each detection
+        score_key: Score field name in each detection
+        
+    Returns:
+        Tuple of (detection counts match, max box difference in pixels,
+        max score difference, number of detections compared)
+    """
+    counts_match = True
+    box_diff = 0.0
+    score_diff = 0.0
+    compared = 0
+    for a, b in zip(results_a, results_b):
+        dets_a, dets_b = a['detections'], b['detections']
+        if len(dets_a) != len(dets_b):
+            counts_match = False
+            continue
+        if not dets_a:
+            continue
+        box_diff = max(box_diff, float(np.abs(
+            np.array([d[key] for d in dets_a]) - np.array([d[key] for d in dets_b])
+        ).max()))
+        score_diff = max(score_diff, float(np.abs(
+            np.array([d[score_key] for d in dets_a]) - np.array([d[score_key] for d in dets_b])
+        ).max()))
+        compared += len(dets_a)
+    return counts_match, box_diff, score_diff, compared
+
+
+def _time(fn, repeats):
+    """Return the best wall time of fn over repeats runs, and its last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_batch(args):
+    """Compare sequential detect() with padded batched detect_batch()."""
+    from models.detr_model import DETRModel
+    from model.detr_detector import DETRDetector
+    
+    images = load_images(args.image_dir, args.num_images, args.sizes)
+    print(f"{len(images)} images, {torch.get_num_threads()} threads, model {args.model}")
+    
+    backend_model = DETRModel(args.model, confidence_threshold=args.confidence, device=args.device)
+    app_detector = DETRDetector(args.model, confidence_threshold=args.confidence, device=args.device)
+    app_detector.load_model()
+    
+    paths = [
+        ('models.DETRModel', backend_model.detect, backend_model.detect_batch, 'bbox', 'confidence'),
+        ('model.DETRDetector', app_detector.detect, app_detector.detect_batch, 'box', 'score'),
+    ]
+    
+    for name, detect, detect_batch, box_key, score_key in paths:
+        # Warm up both paths so one-time allocations are not timed
+        detect(images[0])
+        detect_batch(images[:2], batch_size=2)
+        
+        seq_time, seq_results = _time(lambda: [detect(image) for image in images], args.repeats)
+        print(f"\n{name}")
+        print(f"  {'mode':<14}{'time (s)':>10}{'images/s':>10}{'speedup':>9}  equivalence")
+        print(f"  {'sequential':<14}{seq_time:>10.2f}{len(images) / seq_time:>10.2f}{1.0:>9.2f}")
+        
+        for batch_size in args.batch_sizes:
+            batch_time, batch_results = _time(
+                lambda: detect_batch(images, batch_size=batch_size), args.repeats
+            )
+            counts_match, box_diff, score_diff, compared = max_box_difference(
+                seq_results, batch_results, box_key, score_key
+            )
+            check = (
+                f"{compared} dets, max |dbox| {box_diff:.2e} px, max |dscore| {score_diff:.2e}"
+                if counts_match else "detection counts differ"
+            )
+            print(f"  {f'batch={batch_size}':<14}{batch_time:>10.2f}{len(images) / batch_time:>10.2f}"
+                  f"{seq_time / batch_time:>9.2f}  {check}")
+
+
+def bench_bucket(args):
+    """Compare input-order batches with aspect-ratio bucketed batches."""
+    from models.bucketing import BucketedBatcher
+    from models.detr_model import DETRModel
+    
+    images = load_images(args.image_dir, args.num_images, args.sizes or MIXED_ORIENTATION_SIZES)
+    print(f"{len(images)} images, {torch.get_num_threads()} threads, model {args.model}")
+    
+    model = DETRModel(args.model, confidence_threshold=args.confidence, device=args.device)
+    model.detect_batch(images[:2], batch_size=2)
+    
+    for bucketing in (False, True):
+        batcher = BucketedBatcher(
+            model,
+            batch_size=args.batch_size,
+            bucketing=bucketing,
+            granularity=args.granularity,
+            max_padding=args.max_padding
+        )
+        elapsed, (_, reports) = _time(lambda: batcher.detect(images), args.repeats)
+        ratios = [report['padding_ratio'] for report in reports]
+        print(f"\n{'bucketed' if bucketing else 'input order'}: {elapsed:.2f}s, "
+              f"{len(images) / elapsed:.2f} images/s, {len(reports)} batches, "
+              f"mean padding {np.mean(ratios):.1%}")
+        for report in reports:
+            print(f"  batch of {report['batch_size']}: padding {report['padding_ratio']:.1%}")
+
+
+def _box_iou(box_a, box_b):
+    """IoU of two [x1, y1, x2, y2] boxes."""
+    inter_w = max(0.0, min(box_a[2], box_b[2]) - max(box_a[0], box_b[0]))
+    inter_h = max(0.0, min(box_a[3], box_b[3]) - max(box_a[1], box_b[1]))
+    inter = inter_w * inter_h
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def detection_agreement(reference, candidate, iou_threshold=0.5):
+    """
+    Measure how well candidate detections reproduce reference detections.
+    
+    A candidate detection matches an unmatched reference detection of the
+    same label with IoU >= iou_threshold (greedy, highest score first).
+    
+    Args:
+        reference: Per-image results of the reference model
+        candidate: Per-image results of the model under test
+        iou_threshold: Minimum IoU for a match
+        
+    Returns:
+        Dictionary with precision, recall and F1 against the reference, the
+        mean IoU and score difference of matched pairs, and their largest
+        box coordinate difference in pixels
+    """
+    matched = 0
+    ref_total = 0
+    cand_total = 0
+    ious = []
+    score_diffs = []
+    box_diffs = []
+    for ref_result, cand_result in zip(reference, candidate):
+        refs = ref_result['detections']
+        cands = sorted(cand_result['detections'], key=lambda d: d['confidence'], reverse=True)
+        ref_total += len(refs)
+        cand_total += len(cands)
+        used = set()
+        for cand in cands:
+            best, best_iou = None, iou_threshold
+            for i, ref in enumerate(refs):
+                if i in used or ref['label_id'] != cand['label_id']:
+                    continue
+                iou = _box_iou(ref['bbox'], cand['bbox'])
+                if iou >= best_iou:
+                    best, best_iou = i, iou
+            if best is not None:
+                used.add(best)
+                matched += 1
+                ious.append(best_iou)
+                score_diffs.append(abs(refs[best]['confidence'] - cand['confidence']))
+                box_diffs.append(max(abs(a - b) for a, b in zip(refs[best]['bbox'], cand['bbox'])))
+    
+    precision = matched / cand_total if cand_total else 1.0
+    recall = matched / ref_total if ref_total else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+        'mean_score_diff': float(np.mean(score_diffs)) if score_diffs else 0.0,
+        'max_box_diff': float(max(box_diffs)) if box_diffs else 0.0
+    }
+
+
+def _model_size_mb(module):
+    """Serialized size of a module's state in MB."""
+    import io
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def _peak_memory_mb(device):
+    """Peak memory since the last reset: CUDA allocations on GPU, process RSS on CPU."""
+    from utils.memory import peak_memory_mb
+    if torch.device(device or 'cpu').type == 'cuda' and torch.cuda.is_available():
+        return torch.cuda.max_memory_allocated() / (1024 * 1024)
+    return peak_memory_mb()
+
+
+def _reset_peak_memory(device):
+    """Reset the counter read by _peak_memory_mb and return current memory in MB."""
+    from utils.memory import process_memory, reset_peak_memory
+    if torch.device(device or 'cpu').type == 'cuda' and torch.cuda.is_available():
+        torch.cuda.reset_peak_memory_stats()
+        return torch.cuda.memory_allocated() / (1024 * 1024)
+    reset_peak_memory()
+    return process_memory().get('rss_mb', 0.0)
+
+
+def bench_precision(args):
+    """Compare accuracy, latency and memory of reduced-precision modes against fp32."""
+    import gc
+    import tempfile
+    from models.detr_model import DETRModel
+    
+    images = load_images(args.image_dir, args.num_images, args.sizes)
+    print(f"{len(images)} images, {torch.get_num_threads()} threads, model {args.model}")
+    if not args.image_dir:
+        print("Synthetic images: agreement shows numerical drift, not task accuracy. "
+              "Use --image-dir with real photos for an accuracy comparison.")
+    
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="tedr-quantized-")
+    reference = None
+    rows = []
+    
+    for precision in ['fp32'] + args.precisions:
+        gc.collect()
+        baseline_mb = _reset_peak_memory(args.device)
+        start = time.perf_counter()
+        model = DETRModel(
+            args.model,
+            confidence_threshold=args.confidence,
+            device=args.device,
+            precision=precision,
+            quantized_cache_dir=cache_dir
+        )
+        load_time = time.perf_counter() - start
+        model.detect(images[0])
+        
+        elapsed, results = _time(lambda: [model.detect(image) for image in images], args.repeats)
+        peak_mb = _peak_memory_mb(args.device) - baseline_mb
+        if reference is None:
+            reference = results
+        agreement = detection_agreement(reference, results)
+        within = agreement['recall'] == 1.0 and agreement['max_box_diff'] <= args.box_tolerance
+        rows.append(
+            f"  {model.precision:<10}{load_time:>9.1f}{_model_size_mb(model.model):>10.1f}"
+            f"{peak_mb:>10.0f}{elapsed / len(images) * 1000:>10.0f}{agreement['precision']:>11.3f}"
+            f"{agreement['recall']:>8.3f}{agreement['f1']:>7.3f}{agreement['mean_iou']:>7.3f}"
+            f"{agreement['mean_score_diff']:>10.4f}{agreement['max_box_diff']:>10.2f}"
+            f"{'ok' if within else 'FAIL':>6}"
+        )
+        del model
+    
+    print(f"\n  {'mode':<10}{'load (s)':>9}{'size (MB)':>10}{'+mem (MB)':>10}{'ms/image':>10}"
+          f"{'precision':>11}{'recall':>8}{'F1':>7}{'IoU':>7}{'|dscore|':>10}{'|dbox|':>10}{'tol':>6}")
+    print("\n".join(rows))
+    print("  (precision/recall/F1/IoU/|dscore|/|dbox| against fp32 detections; tol: every fp32")
+    print(f"   detection found with boxes within {args.box_tolerance} px; +mem: peak memory growth while")
+    print("   loading and running the mode, process RSS on CPU)")
+
+
+def bench_backend(args):
+    """Compare the ONNX Runtime backend with eager PyTorch."""
+    from models.detr_model import DETRModel
+    
+    images = load_images(args.image_dir, args.num_images, args.sizes)
+    print(f"{len(images)} images, {torch.get_num_threads()} threads, model {args.model}")
+    
+    reference = None
+    rows = []
+    for backend in ('torch', 'onnx'):
+        start = time.perf_counter()
+        model = DETRModel(
+            args.model,
+            confidence_threshold=args.confidence,
+            device=args.device,
+            backend=backend,
+            onnx_path=args.onnx_path
+        )
+        model.detect(images[0])
+        load_time = time.perf_counter() - start
+        
+        elapsed, results = _time(lambda: [model.detect(image) for image in images], args.repeats)
+        batch_time, _ = _time(lambda: model.detect_batch(images, batch_size=args.batch_size), args.repeats)
+        if reference is None:
+            reference = results
+        agreement = detection_agreement(reference, results)
+        rows.append(
+            f"  {backend:<8}{load_time:>16.1f}{elapsed / len(images) * 1000:>10.0f}"
+            f"{batch_time / len(images) * 1000:>16.0f}{agreement['f1']:>12.3f}"
+            f"{agreement['mean_score_diff']:>10.2e}"
+        )
+        del model
+    
+    print(f"\n  {'backend':<8}{'load+first (s)':>16}{'ms/image':>10}"
+          f"{f'ms/image (b={args.batch_size})':>16}{'F1 vs torch':>12}{'|dscore|':>10}")
+    print("\n".join(rows))
+
+
+def bench_resolution(args):
+    """Compare accuracy and latency of inference resolutions against the largest."""
+    from models.detr_model import DETRModel, resolve_resolution
+    
+    images = load_images(args.image_dir, args.num_images, args.sizes)
+    print(f"{len(images)} images, {torch.get_num_threads()} threads, model {args.model}")
+    if not args.image_dir:
+        print("Synthetic images: agreement shows numerical drift, not task accuracy. "
+              "Use --image-dir with real photos for an accuracy comparison.")
+    
+    model = DETRModel(args.model, confidence_threshold=args.confidence, device=args.device)
+    
+    # Largest resolution first; it is the reference the others are scored against
+    resolutions = sorted(
+        ((name, resolve_resolution(name)) for name in args.resolutions),
+        key=lambda item: item[1],
+        reverse=True
+    )
+    reference = None
+    rows = []
+    for name, resolution in resolutions:
+        model.detect(images[0], resolution=resolution)
+        elapsed, results = _time(
+            lambda: [model.detect(image, resolution=resolution) for image in images],
+            args.repeats
+        )
+        if reference is None:
+            reference = results
+        agreement = detection_agreement(reference, results)
+        rows.append(
+            f"  {name:<10}{f'{resolution[0]}/{resolution[1]}':>11}{elapsed / len(images) * 1000:>10.0f}"
+            f"{agreement['precision']:>11.3f}{agreement['recall']:>8.3f}{agreement['f1']:>7.3f}"
+            f"{agreement['mean_iou']:>7.3f}"
+        )
+    
+    print(f"\n  {'preset':<10}{'short/long':>11}{'ms/image':>10}"
+          f"{'precision':>11}{'recall':>8}{'F1':>7}{'IoU':>7}")
+    print("\n".join(rows))
+    print(f"  (precision/recall/F1/IoU against {resolutions[0][0]} detections)")
+
+
+def bench_early_exit(args):
+    """Compare decoder early exit at several margins against running all layers."""
+    from models.detr_model import DETRModel
+    
+    images = load_images(args.image_dir, args.num_images, args.sizes)
+    print(f"{len(images)} images, {torch.get_num_threads()} threads, model {args.model}")
+    if not args.image_dir:
+        print("Synthetic images: agreement shows numerical drift, not task accuracy. "
+              "Use --image-dir with real photos for an accuracy comparison.")
+    
+    model = DETRModel(
+        args.model,
+        confidence_threshold=args.confidence,
+        device=args.device,
+        early_exit=True,
+        early_exit_min_layers=args.min_layers
+    )
+    early_exit, model.early_exit = model.early_exit, None
+    
+    model.detect(images[0])
+    elapsed, reference = _time(lambda: [model.detect(image) for image in images], args.repeats)
+    total_layers = early_exit.num_layers
+    rows = [
+        f"  {'all layers':<12}{elapsed / len(images) * 1000:>10.0f}{total_layers:>8.1f}{0.0:>10.1f}"
+        f"{1.0:>11.3f}{1.0:>8.3f}{1.0:>7.3f}{0.0:>12.2f}"
+    ]
+    
+    model.early_exit = early_exit
+    for margin in args.margins:
+        early_exit.margin = margin
+        model.detect(images[0])
+        elapsed, results = _time(lambda: [model.detect(image) for image in images], args.repeats)
+        layers = np.mean([result['early_exit']['decoder_layers'] for result in results])
+        saved = np.mean([result['early_exit']['saved_ms'] for result in results])
+        agreement = detection_agreement(reference, results)
+        rows.append(
+            f"  {f'margin {margin}':<12}{elapsed / len(images) * 1000:>10.0f}{layers:>8.1f}{saved:>10.1f}"
+            f"{agreement['precision']:>11.3f}{agreement['recall']:>8.3f}{agreement['f1']:>7.3f}"
+            f"{agreement['max_box_diff']:>12.2f}"
+        )
+    
+    print(f"\n  {'mode':<12}{'ms/image':>10}{'layers':>8}{'saved ms':>10}"
+          f"{'precision':>11}{'recall':>8}{'F1':>7}{'max |dbox|':>12}")
+    print("\n".join(rows))
+    print(f"  (layers: mean decoder layers run of {total_layers}; saved ms: estimate reported with each "
+          f"result; precision/recall/F1 and box difference in px against all layers)")
+
+
+def synthetic_detections(count, num_classes=8, image_size=(3840, 2160), seed=0):
+    """
+    Generate overlapping detections like those merged from tiled inference.
+    
+    Boxes come in clusters of jittered copies around random objects, so
+    NMS has real work to do.
+    
+    Args:
+        count: Number of detections
+        num_classes: Number of distinct label ids
+        image_size: (width, height) boxes are placed in
+        seed: Random seed
+        
+    Returns:
+        List of detection dictionaries
+    """
+    rng = np.random.default_rng(seed)
+    width, height = image_size
+    num_objects = max(1, count // 5)
+    
+    centers = rng.uniform((0, 0), (width, height), size=(num_objects, 2))
+    extents = rng.uniform(20, 200, size=(num_objects, 2))
+    labels = rng.integers(1, num_classes + 1, size=num_objects)
+    
+    owner = rng.integers(0, num_objects, size=count)
+    jitter = rng.normal(0, 0.1, size=(count, 4)) * np.repeat(extents[owner], 2, axis=1)
+    boxes = np.concatenate([centers[owner] - extents[owner] / 2, centers[owner] + extents[owner] / 2], axis=1) + jitter
+    scores = rng.uniform(0.5, 1.0, size=count)
+    
+    return [
+        {'box': box, 'score': score, 'label': str(label), 'label_id': int(label), 'category': 'other'}
+        for box, score, label in zip(boxes.tolist(), scores.tolist(), labels[owner].tolist())
+    ]
+
+
+def _python_nms(detections, iou_threshold=0.5):
+    """Class-agnostic pure-Python NMS that model.utils.apply_nms used to be, for reference."""
+    from model.utils import calculate_iou
+    
+    detections = sorted(detections, key=lambda x: x['score'], reverse=True)
+    keep = []
+    while len(detections) > 0:
+        best = detections[0]
+        keep.append(best)
+        detections = [det for det in detections[1:] if calculate_iou(best['box'], det['box']) < iou_threshold]
+    return keep
+
+
+def bench_nms(args):
+    """Compare vectorised NMS with the pure-Python reference."""
+    from model.utils import apply_nms
+    
+    rows = []
+    for count in args.counts:
+        detections = synthetic_detections(count)
+        
+        python_time, reference = _time(lambda: _python_nms(detections, args.iou_threshold), args.repeats)
+        agnostic_time, agnostic = _time(
+            lambda: apply_nms(detections, args.iou_threshold, class_aware=False),
+            args.repeats
+        )
+        aware_time, aware = _time(
+            lambda: apply_nms(detections, args.iou_threshold, class_aware=True),
+            args.repeats
+        )
+        rows.append(
+            f"  {count:>7}{python_time * 1000:>12.1f}{agnostic_time * 1000:>13.1f}"
+            f"{python_time / agnostic_time:>9.0f}x{str(agnostic == reference):>8}"
+            f"{aware_time * 1000:>13.1f}{len(agnostic):>8}{len(aware):>10}"
+        )
+    
+    print(f"\n  {'boxes':>7}{'python (ms)':>12}{'numpy (ms)':>13}{'speedup':>10}{'same':>8}"
+          f"{'per-class':>13}{'kept':>8}{'kept/cls':>10}")
+    print("\n".join(rows))
+
+
+# Run in a fresh interpreter per measurement, so imports are cold
+_STARTUP_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import torch
+after_torch = time.perf_counter()
+from models.detr_model import DETRModel
+after_imports = time.perf_counter()
+model = DETRModel(sys.argv[1], device=sys.argv[2] or None)
+after_load = time.perf_counter()
+from PIL import Image
+model.detect(Image.new("RGB", (640, 480)))
+print(json.dumps({
+    "import torch": after_torch - start,
+    "import transformers": after_imports - after_torch,
+    **model.load_breakdown,
+    "load total": after_load - after_imports,
+    "first detect": time.perf_counter() - after_load
+}))
+"""
+
+
+def bench_startup(args):
+    """Break down cold-start time of a hub/checkpoint model vs its prepared copy."""
+    import json
+    import subprocess
+    
+    sources = [("model", args.model)] + ([("prepared", args.prepared)] if args.prepared else [])
+    columns = None
+    rows = []
+    for label, source in sources:
+        best = None
+        for _ in range(args.repeats):
+            proc = subprocess.run(
+                [sys.executable, "-c", _STARTUP_CHILD, source, args.device or ""],
+                capture_output=True,
+                text=True,
+                cwd=str(Path(__file__).parent)
+            )
+            if proc.returncode != 0:
+                raise RuntimeError(f"Loading {source} failed:\n{proc.stderr[-2000:]}")
+            timings = json.loads(proc.stdout.strip().splitlines()[-1])
+            if best is None or timings["load total"] < best["load total"]:
+                best = timings
+        columns = list(best)
+        rows.append((f"{label} ({source})", best))
+    
+    for name, _ in rows:
+        print(name)
+    print(f"\n  {'stage (s)':<22}" + "".join(f"{label:>12}" for label, _ in sources))
+    for column in columns:
+        print(f"  {column:<22}" + "".join(f"{timings.get(column, 0.0):>12.2f}" for _, timings in rows))
+
+
+def main():
+    """Main function for CLI usage."""
+    parser = argparse.ArgumentParser(description="TEDR inference benchmarks")
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="facebook/detr-resnet-50",
+        help="Model name or local path (default: facebook/detr-resnet-50)"
+    )
+    parser.add_argument("--device", type=str, default=None, help="Device ('cuda' or 'cpu')")
+    parser.add_argument(
+        "--image-dir",
+        type=str,
+        default=None,
+        help="Directory of benchmark images (default: synthetic images)"
+    )
+    parser.add_argument("--num-images", type=int, default=16, help="Number of images (default: 16)")
+    parser.add_argument(
+        "--sizes",
+        type=parse_size,
+        nargs="+",
+        default=None,
+        help="Synthetic image sizes as WIDTHxHEIGHT, cycled (default: mixed 4:3 and 16:9)"
+    )
+    parser.add_argument("--repeats", type=int, default=1, help="Timed runs per mode, best is reported")
+    parser.add_argument(
+        "-c", "--confidence",
+        type=float,
+        default=0.7,
+        help="Confidence threshold (default: 0.7)"
+    )
+    
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    batch_parser = subparsers.add_parser("batch", help="Sequential vs batched forward passes")
+    batch_parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="Batch sizes to benchmark (default: 1 2 4 8)"
+    )
+    batch_parser.set_defaults(func=bench_batch)
+    
+    bucket_parser = subparsers.add_parser(
+        "bucket",
+        help="Input-order vs aspect-ratio bucketed batches (default: mixed orientations)"
+    )
+    bucket_parser.add_argument("--batch-size", type=int, default=4, help="Images per batch (default: 4)")
+    bucket_parser.add_argument("--granularity", type=int, default=64, help="Bucket size in pixels")
+    bucket_parser.add_argument(
+        "--max-padding",
+        type=float,
+        default=0.2,
+        help="Max padding fraction when mixing buckets (default: 0.2)"
+    )
+    bucket_parser.set_defaults(func=bench_bucket)
+    
+    precision_parser = subparsers.add_parser(
+        "precision",
+        help="Accuracy and latency of reduced precision against fp32"
+    )
+    precision_parser.add_argument(
+        "--precisions",
+        nargs="+",
+        default=["int8", "bf16", "fp16"],
+        help="Precisions compared with fp32 (default: int8 bf16 fp16)"
+    )
+    precision_parser.add_argument(
+        "--box-tolerance",
+        type=float,
+        default=2.0,
+        help="Largest box coordinate difference from fp32, in pixels (default: 2.0)"
+    )
+    precision_parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Quantized model cache (default: a temporary directory)"
+    )
+    precision_parser.set_defaults(func=bench_precision)
+    
+    backend_parser = subparsers.add_parser("backend", help="ONNX Runtime vs eager PyTorch")
+    backend_parser.add_argument(
+        "--onnx-path",
+        type=str,
+        default="./exported/detr-onnx",
+        help="Directory produced by export_onnx.py (default: ./exported/detr-onnx)"
+    )
+    backend_parser.add_argument("--batch-size", type=int, default=4, help="Images per batch (default: 4)")
+    backend_parser.set_defaults(func=bench_backend)
+    
+    resolution_parser = subparsers.add_parser(
+        "resolution",
+        help="Accuracy and latency of resolution presets against the largest"
+    )
+    resolution_parser.add_argument(
+        "--resolutions",
+        nargs="+",
+        default=["accurate", "balanced", "fast"],
+        help="Presets or shortest edges in pixels (default: accurate balanced fast)"
+    )
+    resolution_parser.set_defaults(func=bench_resolution)
+    
+    nms_parser = subparsers.add_parser("nms", help="Vectorised vs pure-Python NMS on synthetic boxes")
+    nms_parser.add_argument(
+        "--counts",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 10000],
+        help="Numbers of boxes (default: 100 1000 10000)"
+    )
+    nms_parser.add_argument("--iou-threshold", type=float, default=0.5, help="IoU threshold (default: 0.5)")
+    nms_parser.set_defaults(func=bench_nms)
+    
+    early_exit_parser = subparsers.add_parser(
+        "early-exit",
+        help="Accuracy and latency of decoder early exit against all layers"
+    )
+    early_exit_parser.add_argument(
+        "--margins",
+        type=float,
+        nargs="+",
+        default=[0.05, 0.1, 0.2],
+        help="Confidence margins to evaluate (default: 0.05 0.1 0.2)"
+    )
+    early_exit_parser.add_argument(
+        "--min-layers",
+        type=int,
+        default=3,
+        help="Decoder layers that always run (default: 3)"
+    )
+    early_exit_parser.set_defaults(func=bench_early_exit)
+    
+    startup_parser = subparsers.add_parser(
+        "startup",
+        help="Cold-start breakdown of --model vs a prepare_model.py directory"
+    )
+    startup_parser.add_argument(
+        "--prepared",
+        type=str,
+        default=None,
+        help="Directory produced by prepare_model.py"
+    )
+    startup_parser.set_defaults(func=bench_startup)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Export a DETR model to ONNX for the ONNX Runtime inference backend.
+
+Usage:
+    python export_onnx.py --model facebook/detr-resnet-50 --output ./exported/detr-onnx
+    python export_onnx.py --model ./checkpoints/best --output ./exported/detr-finetuned-onnx
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import argparse
+import time
+
+from models.onnx_backend import ONNX_OPSET, export_onnx
+
+
+def main():
+    """Main function for CLI usage."""
+    parser = argparse.ArgumentParser(
+        description="Export a DETR model or fine-tuned checkpoint to ONNX"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="facebook/detr-resnet-50",
+        help="Model name or checkpoint directory (default: facebook/detr-resnet-50)"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default="./exported/detr-onnx",
+        help="Output directory (default: ./exported/detr-onnx)"
+    )
+    parser.add_argument(
+        "--opset",
+        type=int,
+        default=ONNX_OPSET,
+        help=f"ONNX opset version (default: {ONNX_OPSET})"
+    )
+    
+    args = parser.parse_args()
+    
+    print(f"Exporting {args.model} to {args.output}...")
+    start_time = time.time()
+    onnx_path = export_onnx(args.model, args.output, args.opset)
+    size_mb = onnx_path.stat().st_size / (1024 * 1024)
+    print(f"Exported {onnx_path} ({size_mb:.1f} MB) in {time.time() - start_time:.1f}s")
+    print("Serve it with model.backend: \"onnx\" and model.onnx_path in config.yaml")
+
+
+if __name__ == "__main__":
+    main()
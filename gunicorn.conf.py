@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for the TEDR Flask application
+
+Loads the DETR model once in the gunicorn master process and moves its
+weights into shared memory before workers are forked, so every worker
+serves from the same copy of the model.
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+"""
+
+import os
+import multiprocessing
+
+
+bind = os.environ.get('TEDR_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('TEDR_WORKERS', multiprocessing.cpu_count()))
+timeout = 120
+# Workers warm up after the fork (see post_fork), not in the master
+wsgi_app = 'app.app:create_app(warmup=False)'
+
+# Import the app in the master so workers inherit it (and the model) on fork
+preload_app = True
+
+
+def on_starting(server):
+    """Load the model in the master and share its weights with the workers"""
+    from app.app import get_detector
+    from utils.memory import share_model_weights
+
+    detector = get_detector()
+    detector.load_model()
+    weights_mb = share_model_weights(detector.model) / (1024 * 1024)
+    server.log.info(f"Loaded {detector.model_name}: {weights_mb:.1f} MB of weights in shared memory")
+
+
+def post_fork(server, worker):
+    """Split the CPU cores between workers and warm up the inherited model"""
+    import torch
+    from app.app import start_warmup
+
+    torch.set_num_threads(max(1, multiprocessing.cpu_count() // server.cfg.workers))
+    start_warmup()
+
+
+def post_worker_init(worker):
+    """Log the worker's memory usage to confirm the weights are shared"""
+    from utils.memory import process_memory
+
+    worker.log.info(f"Worker {worker.pid} memory: {process_memory(worker.pid)}")
@@ -3,7 +3,14 @@ TEDR Model Package
 Transformer-based object detection for Indian roads
 """
 
-from .detr_detector import DETRDetector
 from .config import Config
 
 __all__ = ['DETRDetector', 'Config']
+
+
+def __getattr__(name):
+    """Import DETRDetector (and with it torch and transformers) on first use"""
+    if name == 'DETRDetector':
+        from .detr_detector import DETRDetector
+        return DETRDetector
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
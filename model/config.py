@@ -2,25 +2,55 @@
 Configuration settings for DETR Object Detector
 """
 
-import torch
 import os
 
 
+class _DefaultDevice:
+    """
+    Class attribute resolving to "cuda" or "cpu" on first access, so that
+    importing the config does not import torch
+    """
+    
+    def __init__(self):
+        self._device = os.environ.get('TEDR_DEVICE')
+    
+    def __get__(self, instance, owner):
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+
 class Config:
     """Configuration class for DETR model and application settings"""
     
     # Model Configuration
-    MODEL_NAME = "facebook/detr-resnet-50"
+    MODEL_NAME = os.environ.get('TEDR_MODEL_NAME', 'facebook/detr-resnet-50')  # Hub name, checkpoint or prepare_model.py directory
     CONFIDENCE_THRESHOLD = 0.7
     NMS_THRESHOLD = 0.5
+    NMS_CLASS_AWARE = True  # Only suppress overlapping boxes of the same class
     
     # Device Configuration
-    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+    DEVICE = _DefaultDevice()  # "cuda" if available, else "cpu" (override with TEDR_DEVICE)
+    
+    # Inference Runtime ("torch", or "onnx" for ONNX Runtime on CPU; export with export_onnx.py)
+    BACKEND = os.environ.get('TEDR_BACKEND', 'torch')
+    PRECISION = os.environ.get('TEDR_PRECISION', 'fp32')  # "fp32", or "bf16"/"fp16" to run the forward pass under autocast
+    ONNX_PATH = os.environ.get('TEDR_ONNX_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'exported', 'detr-onnx'))
+    EARLY_EXIT = os.environ.get('TEDR_EARLY_EXIT', '0').lower() in ('1', 'true', 'yes')  # Stop the decoder once predictions settle
+    EARLY_EXIT_MARGIN = 0.1  # Scores this close to CONFIDENCE_THRESHOLD keep the decoder running
+    EARLY_EXIT_MIN_LAYERS = 3  # Decoder layers that always run (of 6)
     
     # Image Configuration
     MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
     IMAGE_MAX_DIMENSION = 1333  # Max dimension for DETR input
+    IMAGE_SIZE = os.environ.get('TEDR_IMAGE_SIZE', 'accurate')  # Shortest edge in pixels, or "fast" (480), "balanced" (640), "accurate" (800)
+    BATCH_SIZE = 4  # Images per padded forward pass in detect_batch
+    
+    # Warmup Configuration (dummy passes run before the app reports ready)
+    WARMUP_RESOLUTIONS = [(1280, 720), (640, 480)]  # (width, height)
+    WARMUP_ITERATIONS = 1
     
     # Upload Configuration
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app', 'static', 'uploads')
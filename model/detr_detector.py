@@ -3,12 +3,58 @@ DETR Object Detector Wrapper
 Uses Hugging Face Transformers implementation of DETR
 """
 
+import time
 import torch
 from transformers import DetrImageProcessor, DetrForObjectDetection
 from PIL import Image
 import numpy as np
+from models.detr_model import AUTOCAST_DTYPES, autocast_context, outputs_to_float32, resolve_resolution
+from models.early_exit import DecoderEarlyExit
+from models.onnx_backend import OnnxDetrModel
+from models.prepared import load_detr_model, load_processor
+from utils.metrics import MODEL_LOAD_SECONDS, count_detections, time_stage
 from .config import Config
-from .utils import process_detections, draw_boxes, get_detection_statistics
+from .utils import process_detections_batch, draw_boxes, get_detection_statistics, scale_detections
+
+
+class AnnotationRenderer:
+    """
+    Draws detections on their image when first called, then reuses the result
+    """
+    
+    def __init__(self, image, detections, original_size):
+        """
+        Args:
+            image: PIL Image the detections are drawn on
+            detections: Detections in original_size coordinates
+            original_size: (width, height) the boxes are expressed in
+        """
+        self.image = image
+        self.detections = detections
+        self.original_size = original_size
+        self._annotated_image = None
+    
+    def __call__(self, image=None):
+        """
+        Get the annotated image
+        
+        Args:
+            image: Draw on this image instead, e.g. a full-resolution decode
+                when the detector saw a reduced-scale one (not cached)
+        
+        Returns:
+            PIL Image with drawn boxes
+        """
+        if image is not None:
+            with time_stage('render'):
+                return draw_boxes(image, scale_detections(self.detections, self.original_size, image.size))
+        if self._annotated_image is None:
+            with time_stage('render'):
+                self._annotated_image = draw_boxes(
+                    self.image,
+                    scale_detections(self.detections, self.original_size, self.image.size)
+                )
+        return self._annotated_image
 
 
 class DETRDetector:
@@ -16,7 +62,7 @@ class DETRDetector:
     DETR (DEtection TRansformer) wrapper for object detection
     """
     
-    def __init__(self, model_name=None, confidence_threshold=None, device=None):
+    def __init__(self, model_name=None, confidence_threshold=None, device=None, resolution=None):
         """
         Initialize DETR detector
         
@@ -24,13 +70,24 @@ class DETRDetector:
             model_name: Hugging Face model name (default: from config)
             confidence_threshold: Minimum confidence for detections (default: from config)
             device: Device to run model on (default: auto-detect)
+            resolution: Inference resolution: preset name ("fast", "balanced",
+                "accurate") or shortest edge in pixels (default: from config)
         """
         self.model_name = model_name or Config.MODEL_NAME
         self.confidence_threshold = confidence_threshold or Config.CONFIDENCE_THRESHOLD
         self.device = device or Config.DEVICE
+        self.resolution = resolve_resolution(resolution or Config.IMAGE_SIZE)
+        
+        # Lookup tables indexed by label id; the extra last entry covers ids
+        # outside COCO_CLASSES
+        label_names = list(Config.COCO_CLASSES) + ['unknown']
+        self._label_names = np.array(label_names, dtype=object)
+        self._label_categories = np.array([Config.get_category(name) for name in label_names], dtype=object)
+        self._label_valid = np.array([name != 'N/A' for name in label_names])
         
         self.processor = None
         self.model = None
+        self.early_exit = None
         self._model_loaded = False
     
     def load_model(self):
@@ -40,22 +97,48 @@ class DETRDetector:
         
         print(f"Loading DETR model: {self.model_name}")
         print(f"Using device: {self.device}")
+        start_time = time.time()
         
-        # Load processor and model
-        self.processor = DetrImageProcessor.from_pretrained(self.model_name)
-        self.model = DetrForObjectDetection.from_pretrained(self.model_name)
+        # Load processor and model (ONNX Runtime runs the exported graph on CPU)
+        if Config.BACKEND == 'onnx':
+            self.device = 'cpu'
+            self.processor = DetrImageProcessor.from_pretrained(Config.ONNX_PATH)
+            self.model = OnnxDetrModel(Config.ONNX_PATH)
+        else:
+            self.processor = load_processor(self.model_name)
+            self.model = load_detr_model(self.model_name)
         self.model.to(self.device)
         self.model.eval()
         
+        # oneDNN's bf16/fp16 convolution kernels expect channels-last weights
+        if Config.BACKEND != 'onnx' and Config.PRECISION in AUTOCAST_DTYPES:
+            self.model.to(memory_format=torch.channels_last)
+        
+        # Stop the decoder once its per-layer predictions settle
+        if Config.BACKEND != 'onnx' and Config.EARLY_EXIT:
+            self.early_exit = DecoderEarlyExit(
+                self.model,
+                self.confidence_threshold,
+                margin=Config.EARLY_EXIT_MARGIN,
+                min_layers=Config.EARLY_EXIT_MIN_LAYERS
+            )
+        
+        MODEL_LOAD_SECONDS.set(time.time() - start_time)
         self._model_loaded = True
         print("Model loaded successfully!")
     
-    def preprocess_image(self, image):
+    def _processor_size(self, resolution=None):
+        """Build the processor's resize setting for a (shortest, longest) resolution"""
+        shortest_edge, longest_edge = resolution or self.resolution
+        return {'shortest_edge': shortest_edge, 'longest_edge': longest_edge}
+    
+    def preprocess_image(self, image, resolution=None):
         """
         Preprocess image for DETR model
         
         Args:
             image: PIL Image or numpy array
+            resolution: (shortest edge, longest edge) to resize to (default: self.resolution)
         
         Returns:
             Preprocessed inputs
@@ -64,11 +147,28 @@ class DETRDetector:
             image = Image.fromarray(image)
         
         # Use processor to prepare inputs
-        inputs = self.processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with time_stage('preprocess'):
+            inputs = self.processor(images=image, size=self._processor_size(resolution), return_tensors="pt")
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
         
         return inputs, image
     
+    def _forward(self, inputs):
+        """
+        Run the model at Config.PRECISION
+        
+        Returns:
+            Tuple of (outputs with fp32 logits and boxes, early exit report
+            or None when early exit is disabled)
+        """
+        precision = Config.PRECISION if Config.BACKEND != 'onnx' else 'fp32'
+        with torch.no_grad(), autocast_context(self.device, precision):
+            if self.early_exit is not None:
+                outputs, early_exit = self.early_exit(inputs)
+            else:
+                outputs, early_exit = self.model(**inputs), None
+        return outputs_to_float32(outputs), early_exit
+    
     def postprocess_outputs(self, outputs, target_sizes, original_image):
         """
         Post-process model outputs to get detections
@@ -88,98 +188,211 @@ class DETRDetector:
             threshold=0.0  # We'll filter later
         )[0]
         
-        detections = []
+        return self._results_to_detections(results)
+    
+    def _results_to_detections(self, results):
+        """
+        Convert post-processed results of one image to detection dictionaries
         
-        # Extract boxes, scores, and labels
-        boxes = results['boxes'].cpu().numpy()
-        scores = results['scores'].cpu().numpy()
-        labels = results['labels'].cpu().numpy()
+        Queries below the confidence threshold or with an N/A class are
+        dropped with tensor operations, so dictionaries are only built for
+        the surviving detections.
         
-        for box, score, label_id in zip(boxes, scores, labels):
-            # Get class name
-            label_name = Config.COCO_CLASSES[label_id] if label_id < len(Config.COCO_CLASSES) else 'unknown'
-            
-            # Skip N/A classes
-            if label_name == 'N/A':
-                continue
-            
-            # Get category
-            category = Config.get_category(label_name)
-            
-            detections.append({
-                'box': box.tolist(),
-                'score': float(score),
+        Args:
+            results: Dictionary with 'boxes', 'scores' and 'labels' tensors
+        
+        Returns:
+            List of detection dictionaries
+        """
+        # Threshold on the model's device and copy only the survivors
+        keep = results['scores'] >= self.confidence_threshold
+        boxes = results['boxes'][keep].cpu().numpy()
+        scores = results['scores'][keep].cpu().numpy()
+        labels = results['labels'][keep].cpu().numpy()
+        
+        # Map label ids to names and categories; ids outside COCO_CLASSES map to 'unknown'
+        index = np.minimum(labels, len(self._label_names) - 1)
+        valid = self._label_valid[index]
+        boxes, scores, labels, index = boxes[valid], scores[valid], labels[valid], index[valid]
+        
+        return [
+            {
+                'box': box,
+                'score': score,
                 'label': label_name,
-                'label_id': int(label_id),
+                'label_id': label_id,
                 'category': category
-            })
+            }
+            for box, score, label_name, label_id, category in zip(
+                boxes.tolist(),
+                scores.tolist(),
+                self._label_names[index],
+                labels.tolist(),
+                self._label_categories[index]
+            )
+        ]
+    
+    def _load_image(self, image_input):
+        """
+        Load an image from a PIL Image, numpy array, or file path
+        
+        Args:
+            image_input: PIL Image, numpy array, or file path
         
-        return detections
+        Returns:
+            RGB PIL Image
+        """
+        if isinstance(image_input, str):
+            return Image.open(image_input).convert('RGB')
+        if isinstance(image_input, np.ndarray):
+            return Image.fromarray(image_input).convert('RGB')
+        return image_input.convert('RGB')
     
-    def detect(self, image_input):
+    def _filter_detections(self, raw_detections_per_image):
+        """
+        Apply the confidence threshold and one batched NMS call to several images
+        
+        Args:
+            raw_detections_per_image: One list of detections from post-processing per image
+        
+        Returns:
+            One filtered list of detections per image
+        """
+        with time_stage('nms'):
+            return process_detections_batch(
+                raw_detections_per_image,
+                confidence_threshold=self.confidence_threshold,
+                nms_threshold=Config.NMS_THRESHOLD,
+                class_aware=Config.NMS_CLASS_AWARE
+            )
+    
+    def _build_result(self, detections, image, original_size, annotate=False, early_exit=None):
+        """
+        Compute statistics for one image and attach a lazy renderer
+        
+        Args:
+            detections: Detections after NMS, in original_size coordinates
+            image: PIL Image the detections are drawn on
+            original_size: (width, height) the boxes are expressed in
+            annotate: Also draw the annotated image right away
+            early_exit: Early exit report of the forward pass, if enabled
+        
+        Returns:
+            Dictionary with 'detections', 'statistics', 'render' (callable
+            returning the annotated image), 'early_exit' if enabled and, if
+            annotate, 'annotated_image'
+        """
+        count_detections(detections)
+        
+        # Get statistics
+        statistics = get_detection_statistics(detections)
+        
+        result = {
+            'detections': detections,
+            'statistics': statistics,
+            'render': AnnotationRenderer(image, detections, original_size)
+        }
+        if early_exit is not None:
+            result['early_exit'] = dict(early_exit)
+        if annotate:
+            result['annotated_image'] = result['render']()
+        return result
+    
+    def detect(self, image_input, original_size=None, resolution=None, annotate=False):
         """
         Perform object detection on an image
         
         Args:
             image_input: PIL Image, numpy array, or file path
+            original_size: Full-resolution (width, height) when the image was
+                decoded at reduced scale; boxes are returned in these
+                coordinates and only scaled down for drawing
+            resolution: (shortest edge, longest edge) to resize to (default: self.resolution)
+            annotate: Draw the annotated image right away; otherwise it is
+                only drawn when result['render']() is called
         
         Returns:
-            Dictionary with 'detections', 'annotated_image', and 'statistics'
+            Dictionary with 'detections', 'statistics', 'render' and, if
+            annotate, 'annotated_image'
         """
         # Load model if not already loaded
         self.load_model()
         
         # Load image if path provided
-        if isinstance(image_input, str):
-            image = Image.open(image_input).convert('RGB')
-        elif isinstance(image_input, np.ndarray):
-            image = Image.fromarray(image_input).convert('RGB')
-        else:
-            image = image_input.convert('RGB')
+        image = self._load_image(image_input)
         
         # Preprocess
-        inputs, original_image = self.preprocess_image(image)
+        inputs, original_image = self.preprocess_image(image, resolution)
         
         # Get image size for post-processing
-        target_sizes = torch.tensor([image.size[::-1]]).to(self.device)
+        original_size = original_size or image.size
+        target_sizes = torch.tensor([original_size[::-1]]).to(self.device)
         
         # Run inference
-        with torch.no_grad():
-            outputs = self.model(**inputs)
+        with time_stage('forward'):
+            outputs, early_exit = self._forward(inputs)
         
         # Post-process outputs
-        raw_detections = self.postprocess_outputs(outputs, target_sizes, original_image)
-        
-        # Filter and apply NMS
-        detections = process_detections(
-            raw_detections,
-            confidence_threshold=self.confidence_threshold,
-            nms_threshold=Config.NMS_THRESHOLD
-        )
+        with time_stage('postprocess'):
+            raw_detections = self.postprocess_outputs(outputs, target_sizes, original_image)
         
-        # Draw boxes on image
-        annotated_image = draw_boxes(original_image, detections)
-        
-        # Get statistics
-        statistics = get_detection_statistics(detections)
-        
-        return {
-            'detections': detections,
-            'annotated_image': annotated_image,
-            'statistics': statistics
-        }
+        detections = self._filter_detections([raw_detections])[0]
+        return self._build_result(detections, original_image, original_size, annotate, early_exit)
     
-    def detect_batch(self, images):
+    def detect_batch(self, images, batch_size=None, original_sizes=None, resolution=None, annotate=False):
         """
         Perform object detection on multiple images
         
+        Images are processed in chunks of batch_size. Each chunk is padded
+        into one pixel_values/pixel_mask batch and run in a single forward
+        pass; the pixel mask keeps padding out of attention, so results
+        match detect() on each image.
+        
         Args:
-            images: List of PIL Images or file paths
+            images: List of PIL Images, numpy arrays, or file paths
+            batch_size: Images per forward pass (default: from config)
+            original_sizes: Optional full-resolution (width, height) per image
+            resolution: (shortest edge, longest edge) to resize to (default: self.resolution)
+            annotate: Draw the annotated images right away (see detect)
         
         Returns:
             List of detection result dictionaries
         """
+        self.load_model()
+        
+        batch_size = max(1, int(batch_size or Config.BATCH_SIZE))
+        images = [self._load_image(image) for image in images]
+        sizes = [
+            (original_sizes[i] if original_sizes and original_sizes[i] else image.size)
+            for i, image in enumerate(images)
+        ]
+        
         results = []
-        for image in images:
-            results.append(self.detect(image))
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            chunk_sizes = sizes[start:start + batch_size]
+            
+            # Preprocess and pad the chunk into one batch
+            with time_stage('preprocess'):
+                inputs = self.processor(images=chunk, size=self._processor_size(resolution), return_tensors="pt")
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            # Run inference
+            with time_stage('forward'):
+                outputs, early_exit = self._forward(inputs)
+            
+            # Post-process with each image's own size
+            with time_stage('postprocess'):
+                target_sizes = torch.tensor([size[::-1] for size in chunk_sizes]).to(self.device)
+                batch_results = self.processor.post_process_object_detection(
+                    outputs,
+                    target_sizes=target_sizes,
+                    threshold=0.0  # We'll filter later
+                )
+                raw_detections = [self._results_to_detections(r) for r in batch_results]
+            
+            filtered = self._filter_detections(raw_detections)
+            for image, size, detections in zip(chunk, chunk_sizes, filtered):
+                results.append(self._build_result(detections, image, size, annotate, early_exit))
+        
         return results
@@ -37,44 +37,189 @@ def calculate_iou(box1, box2):
     return inter_area / union_area
 
 
-def apply_nms(detections, iou_threshold=0.5):
+def box_iou_matrix(boxes_a, boxes_b):
+    """
+    Calculate pairwise Intersection over Union between two sets of boxes
+    
+    Args:
+        boxes_a: Array of shape (n, 4) with [x1, y1, x2, y2] boxes
+        boxes_b: Array of shape (m, 4) with [x1, y1, x2, y2] boxes
+    
+    Returns:
+        Array of shape (n, m) with IoU scores (0 where the union is empty)
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    
+    # Intersection, computed in place to limit temporaries of shape (n, m)
+    inter_area = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    inter_area -= np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    np.maximum(inter_area, 0, out=inter_area)
+    inter_h = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter_h -= np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    np.maximum(inter_h, 0, out=inter_h)
+    inter_area *= inter_h
+    
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union_area = area_a[:, None] + area_b[None, :]
+    union_area -= inter_area
+    
+    iou = np.zeros_like(inter_area)
+    np.divide(inter_area, union_area, out=iou, where=union_area != 0)
+    return iou
+
+
+# Rows of the IoU matrix computed at once, bounding memory for large inputs
+NMS_BLOCK_SIZE = 256
+
+
+def _greedy_nms(boxes, iou_threshold):
+    """
+    Greedy suppression over boxes already sorted by descending score
+    
+    The IoU matrix is computed in vectorised row blocks. Before each block,
+    rows of boxes already suppressed by an earlier block are dropped, so
+    most of the matrix is never computed when many boxes overlap.
+    
+    Args:
+        boxes: Array of shape (n, 4)
+        iou_threshold: Boxes overlapping a kept box by at least this IoU are removed
+    
+    Returns:
+        Indices into boxes of the kept boxes
+    """
+    n = len(boxes)
+    suppressed = np.zeros(n, dtype=bool)
+    keep = []
+    
+    for start in range(0, n, NMS_BLOCK_SIZE):
+        rows = start + np.flatnonzero(~suppressed[start:start + NMS_BLOCK_SIZE])
+        if len(rows) == 0:
+            continue
+        
+        # A box can only be suppressed by a higher-scored one, so columns start at the block
+        overlaps = box_iou_matrix(boxes[rows], boxes[start:]) >= iou_threshold
+        for row, index in enumerate(rows):
+            if suppressed[index]:
+                continue
+            keep.append(index)
+            suppressed[start:] |= overlaps[row]
+    
+    return np.array(keep, dtype=np.int64)
+
+
+def batched_nms(boxes, scores, groups=None, iou_threshold=0.5):
+    """
+    Vectorised Non-Maximum Suppression, applied independently per group
+    
+    Boxes only suppress boxes of the same group, like the coordinate-offset
+    trick of batched NMS, but each group's IoU matrix is computed on its own
+    so memory stays proportional to the largest group. Groups can be class
+    ids (class-aware NMS), image ids (a whole batch in one call), or both
+    combined.
+    
+    Args:
+        boxes: Array of shape (n, 4) with [x1, y1, x2, y2] boxes
+        scores: Array of shape (n,) with confidence scores
+        groups: Optional integer array of shape (n,); None puts all boxes
+            in one group (class-agnostic)
+        iou_threshold: IoU threshold for suppression
+    
+    Returns:
+        Indices of the kept boxes, sorted by descending score
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    # Stable sort keeps input order among equal scores
+    order = np.argsort(-scores, kind='stable')
+    if groups is None:
+        return order[_greedy_nms(boxes[order], iou_threshold)]
+    
+    groups = np.asarray(groups).reshape(-1)[order]
+    keep = []
+    for group in np.unique(groups):
+        members = order[groups == group]
+        keep.append(members[_greedy_nms(boxes[members], iou_threshold)])
+    keep = np.concatenate(keep)
+    
+    # Restore descending score order across groups
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return keep[np.argsort(rank[keep], kind='stable')]
+
+
+def apply_nms(detections, iou_threshold=0.5, class_aware=False):
     """
     Apply Non-Maximum Suppression to remove overlapping boxes
     
     Args:
         detections: List of detection dictionaries with 'box', 'score', 'label'
         iou_threshold: IoU threshold for suppression
+        class_aware: Only suppress boxes with the same label_id, so e.g. a
+            rider on a motorcycle keeps both detections (every detection
+            then needs a 'label_id')
     
     Returns:
-        Filtered list of detections
+        Filtered list of detections, sorted by descending score
+    
+    Raises:
+        ValueError: If class_aware is set and a detection has no 'label_id'
+    """
+    return apply_nms_batch([detections], iou_threshold, class_aware)[0]
+
+
+def apply_nms_batch(detections_per_image, iou_threshold=0.5, class_aware=False):
     """
-    if len(detections) == 0:
-        return []
+    Apply Non-Maximum Suppression to several images in one vectorised call
     
-    # Sort by confidence score (descending)
-    detections = sorted(detections, key=lambda x: x['score'], reverse=True)
+    Args:
+        detections_per_image: One list of detection dictionaries per image
+        iou_threshold: IoU threshold for suppression
+        class_aware: Only suppress boxes with the same label_id
     
-    keep = []
+    Returns:
+        One filtered list of detections per image, sorted by descending score
     
-    while len(detections) > 0:
-        # Keep the detection with highest confidence
-        best = detections[0]
-        keep.append(best)
-        detections = detections[1:]
-        
-        # Remove detections with high IoU with the best detection
-        detections = [
-            det for det in detections 
-            if calculate_iou(best['box'], det['box']) < iou_threshold
-        ]
+    Raises:
+        ValueError: If class_aware is set and a detection has no 'label_id'
+    """
+    flat = [det for detections in detections_per_image for det in detections]
+    if not flat:
+        return [[] for _ in detections_per_image]
+    
+    boxes = np.array([det['box'] for det in flat], dtype=np.float64)
+    scores = np.array([det['score'] for det in flat], dtype=np.float64)
+    
+    # Group by image, and by class within each image when class-aware
+    image_ids = np.repeat(np.arange(len(detections_per_image)), [len(d) for d in detections_per_image])
+    groups = image_ids
+    if class_aware:
+        if any('label_id' not in det for det in flat):
+            raise ValueError("Class-aware NMS needs a 'label_id' on every detection")
+        label_ids = np.array([det['label_id'] for det in flat])
+        _, label_groups = np.unique(label_ids, return_inverse=True)
+        groups = image_ids * (label_groups.max() + 1) + label_groups
+    
+    keep = batched_nms(boxes, scores, groups, iou_threshold)
     
-    return keep
+    results = [[] for _ in detections_per_image]
+    for index in keep:
+        results[image_ids[index]].append(flat[index])
+    return results
 
 
 def draw_boxes(image, detections, show_confidence=True):
     """
     Draw bounding boxes on image with labels and confidence scores
     
+    Drawing happens directly on an RGB copy of the image, and each box's
+    semi-transparent fill is blended only inside the box, so the cost
+    grows with the boxed area instead of one full-frame blend per box.
+    
     Args:
         image: PIL Image
         detections: List of detection dictionaries
@@ -83,8 +228,8 @@ def draw_boxes(image, detections, show_confidence=True):
     Returns:
         PIL Image with drawn boxes
     """
-    # Convert PIL to OpenCV format for better drawing
-    img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    img = np.array(image.convert('RGB'))
+    height, width = img.shape[:2]
     
     for det in detections:
         box = det['box']
@@ -92,18 +237,21 @@ def draw_boxes(image, detections, show_confidence=True):
         score = det['score']
         category = det['category']
         
-        # Get color for category (BGR format for OpenCV)
-        color_rgb = Config.get_category_color(category)
-        color_bgr = (color_rgb[2], color_rgb[1], color_rgb[0])
+        # Get color for category (RGB, since we draw on the RGB array)
+        color = Config.get_category_color(category)
         
         # Draw rectangle
         x1, y1, x2, y2 = map(int, box)
-        cv2.rectangle(img_cv, (x1, y1), (x2, y2), color_bgr, 3)
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 3)
         
-        # Draw semi-transparent fill
-        overlay = img_cv.copy()
-        cv2.rectangle(overlay, (x1, y1), (x2, y2), color_bgr, -1)
-        cv2.addWeighted(overlay, 0.1, img_cv, 0.9, 0, img_cv)
+        # Draw semi-transparent fill, blending only the box's region
+        left, right = max(min(x1, x2), 0), min(max(x1, x2), width - 1)
+        top, bottom = max(min(y1, y2), 0), min(max(y1, y2), height - 1)
+        if left <= right and top <= bottom:
+            roi = img[top:bottom + 1, left:right + 1]
+            fill = np.empty_like(roi)
+            fill[:] = color
+            cv2.addWeighted(fill, 0.1, roi, 0.9, 0, roi)
         
         # Prepare label text
         if show_confidence:
@@ -120,22 +268,44 @@ def draw_boxes(image, detections, show_confidence=True):
         # Draw label background
         label_y1 = max(y1 - text_height - 10, 0)
         label_y2 = label_y1 + text_height + 10
-        cv2.rectangle(img_cv, (x1, label_y1), (x1 + text_width + 10, label_y2), color_bgr, -1)
+        cv2.rectangle(img, (x1, label_y1), (x1 + text_width + 10, label_y2), color, -1)
         
         # Draw label text (white with shadow for readability)
         text_x = x1 + 5
         text_y = label_y1 + text_height + 5
         # Shadow
-        cv2.putText(img_cv, text, (text_x + 1, text_y + 1), font, font_scale, (0, 0, 0), thickness)
+        cv2.putText(img, text, (text_x + 1, text_y + 1), font, font_scale, (0, 0, 0), thickness)
         # Main text
-        cv2.putText(img_cv, text, (text_x, text_y), font, font_scale, (255, 255, 255), thickness)
+        cv2.putText(img, text, (text_x, text_y), font, font_scale, (255, 255, 255), thickness)
+    
+    return Image.fromarray(img)
+
+
+def scale_detections(detections, from_size, to_size):
+    """
+    Rescale detection boxes from one image size to another
+    
+    Args:
+        detections: List of detection dictionaries
+        from_size: (width, height) the boxes are expressed in
+        to_size: (width, height) to map the boxes to
+    
+    Returns:
+        List of detections with rescaled boxes (the input list if sizes match)
+    """
+    if tuple(from_size) == tuple(to_size):
+        return detections
     
-    # Convert back to PIL Image
-    img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
-    return Image.fromarray(img_rgb)
+    scale_x = to_size[0] / from_size[0]
+    scale_y = to_size[1] / from_size[1]
+    return [
+        {**det, 'box': [det['box'][0] * scale_x, det['box'][1] * scale_y,
+                        det['box'][2] * scale_x, det['box'][3] * scale_y]}
+        for det in detections
+    ]
 
 
-def process_detections(raw_detections, confidence_threshold=0.7, nms_threshold=0.5):
+def process_detections(raw_detections, confidence_threshold=0.7, nms_threshold=0.5, class_aware=False):
     """
     Process raw model outputs into clean detection results
     
@@ -143,20 +313,35 @@ def process_detections(raw_detections, confidence_threshold=0.7, nms_threshold=0
         raw_detections: List of raw detection dictionaries
         confidence_threshold: Minimum confidence to keep detection
         nms_threshold: IoU threshold for NMS
+        class_aware: Only suppress overlapping boxes of the same class
     
     Returns:
         Filtered and processed list of detections
     """
+    return process_detections_batch([raw_detections], confidence_threshold, nms_threshold, class_aware)[0]
+
+
+def process_detections_batch(raw_detections_per_image, confidence_threshold=0.7, nms_threshold=0.5, class_aware=False):
+    """
+    Process raw model outputs of several images with one batched NMS call
+    
+    Args:
+        raw_detections_per_image: One list of raw detection dictionaries per image
+        confidence_threshold: Minimum confidence to keep detection
+        nms_threshold: IoU threshold for NMS
+        class_aware: Only suppress overlapping boxes of the same class
+    
+    Returns:
+        One filtered and processed list of detections per image
+    """
     # Filter by confidence
     filtered = [
-        det for det in raw_detections 
-        if det['score'] >= confidence_threshold
+        [det for det in raw_detections if det['score'] >= confidence_threshold]
+        for raw_detections in raw_detections_per_image
     ]
     
     # Apply NMS
-    filtered = apply_nms(filtered, nms_threshold)
-    
-    return filtered
+    return apply_nms_batch(filtered, nms_threshold, class_aware)
 
 
 def get_detection_statistics(detections):
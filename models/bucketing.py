@@ -0,0 +1,222 @@
+"""Aspect-ratio bucketing for batched DETR inference."""
+import math
+import threading
+from collections import defaultdict
+from typing import Dict, Iterator, List, Sequence, Tuple
+from PIL import Image
+
+
+def resized_shape(
+    size: Tuple[int, int],
+    shortest_edge: int = 800,
+    longest_edge: int = 1333
+) -> Tuple[int, int]:
+    """Estimate the shape an image has after the DETR processor resize.
+    
+    Args:
+        size: Image size as (width, height)
+        shortest_edge: Target length of the shorter side
+        longest_edge: Maximum length of the longer side
+        
+    Returns:
+        Resized shape as (height, width)
+    """
+    width, height = size
+    scale = shortest_edge / min(width, height)
+    if max(width, height) * scale > longest_edge:
+        scale = longest_edge / max(width, height)
+    return int(round(height * scale)), int(round(width * scale))
+
+
+def padding_ratio(shapes: Sequence[Tuple[int, int]]) -> float:
+    """Compute the fraction of a padded batch that is padding.
+    
+    Args:
+        shapes: Shapes (height, width) of the images in the batch
+        
+    Returns:
+        Padding fraction between 0 and 1
+    """
+    if not shapes:
+        return 0.0
+    max_height = max(height for height, _ in shapes)
+    max_width = max(width for _, width in shapes)
+    used = sum(height * width for height, width in shapes)
+    return 1.0 - used / (len(shapes) * max_height * max_width)
+
+
+class BucketedBatcher:
+    """Group images of similar resized shape into batches for DETRModel.
+    
+    Images are padded to the largest height and width in their batch, so a
+    portrait phone photo batched with landscape dashcam frames spends most
+    of its backbone compute on zeros. The batcher buckets images by their
+    resized shape (rounded up to granularity pixels), cuts full batches from
+    each bucket, and packs the leftovers in aspect-ratio order as long as
+    the padding stays below max_padding.
+    
+    Results are returned in input order, together with a report per batch.
+    """
+    
+    def __init__(
+        self,
+        model,
+        batch_size: int = 8,
+        bucketing: bool = True,
+        granularity: int = 64,
+        max_padding: float = 0.2
+    ):
+        """Initialize batcher.
+        
+        Args:
+            model: DETRModel instance
+            batch_size: Maximum number of images per forward pass
+            bucketing: Group images by shape (False keeps input order)
+            granularity: Bucket size in pixels of resized height and width
+            max_padding: Largest padding fraction allowed when packing
+                leftovers of different buckets into one batch
+        """
+        self.model = model
+        self.batch_size = max(1, int(batch_size))
+        self.bucketing = bucketing
+        self.granularity = max(1, int(granularity))
+        self.max_padding = float(max_padding)
+        
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._padding_sum = 0.0
+    
+    def plan(
+        self,
+        sizes: Sequence[Tuple[int, int]],
+        resolution: Tuple[int, int] = None
+    ) -> List[List[int]]:
+        """Split images into batches with little padding.
+        
+        Args:
+            sizes: Image sizes as (width, height)
+            resolution: (shortest edge, longest edge) the model resizes to
+                (default: the model's resolution)
+            
+        Returns:
+            Batches as lists of indices into sizes
+        """
+        if not self.bucketing:
+            return [
+                list(range(start, min(start + self.batch_size, len(sizes))))
+                for start in range(0, len(sizes), self.batch_size)
+            ]
+        
+        shortest_edge, longest_edge = resolution or self.model.resolution
+        shapes = [resized_shape(size, shortest_edge, longest_edge) for size in sizes]
+        buckets = defaultdict(list)
+        for index, (height, width) in enumerate(shapes):
+            key = (math.ceil(height / self.granularity), math.ceil(width / self.granularity))
+            buckets[key].append(index)
+        
+        batches = []
+        leftovers = []
+        for indices in buckets.values():
+            full = len(indices) - len(indices) % self.batch_size
+            for start in range(0, full, self.batch_size):
+                batches.append(indices[start:start + self.batch_size])
+            leftovers.extend(indices[full:])
+        
+        # Pack partial buckets in aspect-ratio order while padding stays low
+        leftovers.sort(key=lambda i: shapes[i][1] / shapes[i][0])
+        current = []
+        for index in leftovers:
+            candidate = current + [index]
+            if current and (
+                len(candidate) > self.batch_size
+                or padding_ratio([shapes[i] for i in candidate]) > self.max_padding
+            ):
+                batches.append(current)
+                candidate = [index]
+            current = candidate
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def iter_detect(
+        self,
+        images: List[Image.Image],
+        original_sizes: List[Tuple[int, int]] = None,
+        resolution: Tuple[int, int] = None
+    ) -> Iterator[Tuple[List[int], List[Dict], Dict]]:
+        """Run detection batch by batch.
+        
+        Args:
+            images: List of PIL Image objects
+            original_sizes: Full-resolution sizes (width, height) to map boxes
+                to, one per image (default: each image's own size)
+            resolution: (shortest edge, longest edge) to resize to
+                (default: the model's resolution)
+                
+        Yields:
+            (indices into images, detection dictionaries, batch report) for
+            each batch; the report has the batch size and its padding ratio
+        """
+        sizes = [
+            (original_sizes[i] if original_sizes and original_sizes[i] else image.size)
+            for i, image in enumerate(images)
+        ]
+        
+        for indices in self.plan([image.size for image in images], resolution):
+            results, ratio = self.model.detect_padded(
+                [images[i] for i in indices],
+                [sizes[i] for i in indices],
+                resolution
+            )
+            with self._lock:
+                self._batches += 1
+                self._images += len(indices)
+                self._padding_sum += ratio
+            yield indices, results, {"batch_size": len(indices), "padding_ratio": round(ratio, 3)}
+    
+    def detect(
+        self,
+        images: List[Image.Image],
+        original_sizes: List[Tuple[int, int]] = None,
+        resolution: Tuple[int, int] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Run detection on all images.
+        
+        Args:
+            images: List of PIL Image objects
+            original_sizes: Full-resolution sizes (width, height) to map boxes to
+            resolution: (shortest edge, longest edge) to resize to
+                (default: the model's resolution)
+            
+        Returns:
+            Tuple of (detection dictionaries in the same order as images,
+            one report per batch)
+        """
+        results = [None] * len(images)
+        reports = []
+        for indices, batch_results, report in self.iter_detect(images, original_sizes, resolution):
+            for index, result in zip(indices, batch_results):
+                results[index] = result
+            reports.append(report)
+        return results, reports
+    
+    def stats(self) -> Dict:
+        """Get bucketing statistics.
+        
+        Returns:
+            Dictionary with batch counts and the average padding ratio
+        """
+        with self._lock:
+            batches, images, padding_sum = self._batches, self._images, self._padding_sum
+        
+        return {
+            "enabled": self.bucketing,
+            "granularity": self.granularity,
+            "max_padding": self.max_padding,
+            "batches": batches,
+            "images": images,
+            "avg_batch_size": round(images / batches, 2) if batches else 0.0,
+            "avg_padding_ratio": round(padding_sum / batches, 3) if batches else 0.0
+        }
@@ -1,9 +1,60 @@
 """DETR model wrapper for object detection."""
+import contextlib
 import torch
 from transformers import DetrImageProcessor, DetrForObjectDetection
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from PIL import Image
 import numpy as np
+import time
+from models.early_exit import DecoderEarlyExit
+from models.onnx_backend import OnnxDetrModel
+from models.prepared import load_detr_model, load_processor
+from models.quantization import load_quantized
+from models.resolution import LONGEST_EDGE_RATIO, RESOLUTION_PRESETS, resolve_resolution  # noqa: F401
+from utils.metrics import BATCH_PADDING_RATIO, MODEL_LOAD_SECONDS, count_detections, time_stage
+
+
+# Supported inference precisions and runtimes
+PRECISIONS = ("fp32", "int8", "bf16", "fp16")
+BACKENDS = ("torch", "onnx")
+
+# Precisions that run the forward pass under autocast, and their dtypes
+AUTOCAST_DTYPES = {
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16
+}
+
+
+def autocast_context(device: Union[str, torch.device], precision: str):
+    """Get the context manager that runs a forward pass at a precision.
+    
+    bf16 and fp16 use torch.autocast, so weights stay fp32 and numerically
+    sensitive ops (softmax, layer norm, losses) keep running in fp32.
+    
+    Args:
+        device: Device the model runs on
+        precision: Inference precision
+        
+    Returns:
+        torch.autocast context for bf16/fp16, a no-op context otherwise
+    """
+    if precision not in AUTOCAST_DTYPES:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=torch.device(device).type, dtype=AUTOCAST_DTYPES[precision])
+
+
+def outputs_to_float32(outputs):
+    """Cast DETR logits and boxes to fp32 so post-processing runs at full precision.
+    
+    Args:
+        outputs: DetrObjectDetectionOutput from a (possibly autocast) forward pass
+        
+    Returns:
+        The same outputs with fp32 logits and pred_boxes
+    """
+    outputs.logits = outputs.logits.float()
+    outputs.pred_boxes = outputs.pred_boxes.float()
+    return outputs
 
 
 class DETRModel:
@@ -13,7 +64,17 @@ class DETRModel:
         self,
         model_name: str = "facebook/detr-resnet-50",
         confidence_threshold: float = 0.7,
-        device: str = None
+        device: str = None,
+        batch_size: int = 8,
+        precision: str = "fp32",
+        quantized_cache_dir: str = None,
+        backend: str = "torch",
+        onnx_path: str = None,
+        image_size: Union[int, str] = 800,
+        max_image_size: int = None,
+        early_exit: bool = False,
+        early_exit_margin: float = 0.1,
+        early_exit_min_layers: int = 3
     ):
         """Initialize DETR model.
         
@@ -21,9 +82,37 @@ class DETRModel:
             model_name: Name of pretrained model from HuggingFace
             confidence_threshold: Minimum confidence score for detections
             device: Device to run model on ('cuda' or 'cpu')
+            batch_size: Maximum number of images per forward pass in detect_batch
+            precision: 'fp32'; 'int8' for dynamic quantization of the
+                transformer linear layers (CPU only); 'bf16' or 'fp16' to
+                run the forward pass under autocast
+            quantized_cache_dir: Directory caching the quantized model
+                (None rebuilds it at every start)
+            backend: 'torch', or 'onnx' to run an exported model with
+                ONNX Runtime on CPU
+            onnx_path: Directory produced by export_onnx.py (onnx backend)
+            image_size: Default inference resolution: preset name or shortest
+                edge in pixels
+            max_image_size: Longest edge in pixels (default: scaled with
+                image_size like DETR's 800/1333)
+            early_exit: Stop the decoder once its per-layer predictions
+                settle (torch backend only); results then report the
+                decoder layers used
+            early_exit_margin: Scores this close to confidence_threshold
+                keep the decoder running
+            early_exit_min_layers: Decoder layers that always run
         """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported backend '{backend}', expected one of {BACKENDS}")
+        if backend == 'onnx' and not onnx_path:
+            raise ValueError("The onnx backend needs onnx_path (run export_onnx.py first)")
+        
         self.model_name = model_name
         self.confidence_threshold = confidence_threshold
+        self.batch_size = max(1, int(batch_size))
+        self.resolution = resolve_resolution(image_size, max_image_size)
         
         # Determine device
         if device is None:
@@ -31,45 +120,279 @@ class DETRModel:
         else:
             self.device = torch.device(device if torch.cuda.is_available() and device == 'cuda' else 'cpu')
         
-        print(f"Loading DETR model on device: {self.device}")
+        # ONNX Runtime runs the exported fp32 graph on CPU
+        self.backend = backend
+        if backend == 'onnx':
+            self.device = torch.device('cpu')
+            if precision != 'fp32':
+                print(f"Precision '{precision}' applies to the torch backend only, using fp32")
+                precision = 'fp32'
+        
+        # Quantized kernels only exist for CPU
+        if precision == 'int8' and self.device.type != 'cpu':
+            print(f"INT8 inference is CPU only, using fp32 on {self.device}")
+            precision = 'fp32'
+        self.precision = precision
+        
+        self.quantized_cache_dir = quantized_cache_dir
+        self.early_exit_settings = {
+            "enabled": early_exit,
+            "margin": early_exit_margin,
+            "min_layers": early_exit_min_layers
+        }
+        
+        print(f"Loading DETR model on device: {self.device} ({self.backend}, {self.precision})")
+        start_time = time.time()
+        self._load(model_name, onnx_path)
+        
+        load_time = time.time() - start_time
+        MODEL_LOAD_SECONDS.set(load_time)
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.load_breakdown.items())
+        print(f"Model loaded successfully: {model_name} ({load_time:.2f}s: {stages})")
+    
+    def _load(self, model_name: str, onnx_path: str = None):
+        """Load processor and weights with the configured backend and precision.
+        
+        Also moves the model to the device and (re)builds the decoder early
+        exit hooks, so the same path serves __init__ and load_model.
+        
+        Args:
+            model_name: Model name or checkpoint directory
+            onnx_path: Directory produced by export_onnx.py (onnx backend)
+        """
+        start_time = time.time()
+        
+        # Seconds spent per loading stage (processor, weights, device)
+        self.load_breakdown = {}
         
         # Load processor and model
-        self.processor = DetrImageProcessor.from_pretrained(model_name)
-        self.model = DetrForObjectDetection.from_pretrained(model_name)
+        if self.backend == 'onnx':
+            self.processor = DetrImageProcessor.from_pretrained(onnx_path)
+            self.load_breakdown["processor"] = time.time() - start_time
+            self.model = OnnxDetrModel(onnx_path)
+        elif self.precision == 'int8':
+            self.processor = load_processor(model_name)
+            self.load_breakdown["processor"] = time.time() - start_time
+            self.model = load_quantized(
+                model_name,
+                lambda: load_detr_model(model_name),
+                self.quantized_cache_dir
+            )
+        else:
+            self.processor = load_processor(model_name)
+            self.load_breakdown["processor"] = time.time() - start_time
+            self.model = load_detr_model(model_name)
+        self.load_breakdown["weights"] = time.time() - start_time - self.load_breakdown["processor"]
+        
+        device_start = time.time()
         self.model.to(self.device)
         self.model.eval()
         
-        print(f"Model loaded successfully: {model_name}")
+        # oneDNN's bf16/fp16 convolution kernels expect channels-last weights
+        if self.precision in AUTOCAST_DTYPES:
+            self.model.to(memory_format=torch.channels_last)
+        self.load_breakdown["device"] = time.time() - device_start
+        
+        # The exported ONNX graph runs all decoder layers in one call
+        self.early_exit = None
+        if self.early_exit_settings["enabled"] and self.backend == 'onnx':
+            print("Decoder early exit applies to the torch backend only, running all layers")
+        elif self.early_exit_settings["enabled"]:
+            self.early_exit = DecoderEarlyExit(
+                self.model,
+                self.confidence_threshold,
+                margin=self.early_exit_settings["margin"],
+                min_layers=self.early_exit_settings["min_layers"]
+            )
     
-    def detect(self, image: Image.Image) -> Dict:
+    def detect(
+        self,
+        image: Image.Image,
+        original_size: Tuple[int, int] = None,
+        resolution: Tuple[int, int] = None
+    ) -> Dict:
         """Perform object detection on an image.
         
         Args:
             image: PIL Image object
+            original_size: Size (width, height) of the full-resolution image
+                when image was decoded at reduced scale; boxes are mapped
+                to this size (default: image.size)
+            resolution: (shortest edge, longest edge) to resize to
+                (default: self.resolution)
             
         Returns:
             Dictionary containing detections with labels, scores, and bounding boxes
         """
         # Preprocess image
-        inputs = self.processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with time_stage('preprocess'):
+            inputs = self.processor(
+                images=image,
+                size=self._processor_size(resolution),
+                return_tensors="pt"
+            )
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
         
         # Get image size
-        image_width, image_height = image.size
+        image_width, image_height = original_size or image.size
         
         # Run inference
-        with torch.no_grad():
-            outputs = self.model(**inputs)
+        with time_stage('forward'):
+            outputs, early_exit = self._forward(inputs)
         
         # Post-process outputs
-        target_sizes = torch.tensor([[image_height, image_width]]).to(self.device)
-        results = self.processor.post_process_object_detection(
-            outputs,
-            target_sizes=target_sizes,
-            threshold=self.confidence_threshold
-        )[0]
-        
-        # Format detections
+        with time_stage('postprocess'):
+            target_sizes = torch.tensor([[image_height, image_width]]).to(self.device)
+            results = self.processor.post_process_object_detection(
+                outputs,
+                target_sizes=target_sizes,
+                threshold=self.confidence_threshold
+            )[0]
+            
+            return self._format_results(results, (image_width, image_height), early_exit)
+    
+    def detect_batch(
+        self,
+        images: List[Image.Image],
+        original_sizes: List[Tuple[int, int]] = None,
+        batch_size: int = None,
+        resolution: Tuple[int, int] = None
+    ) -> List[Dict]:
+        """Perform object detection on a batch of images.
+        
+        Images are processed in chunks of batch_size: each chunk is padded
+        into a single pixel_values/pixel_mask batch and run through the
+        model in one forward pass. The pixel mask keeps padding out of
+        attention, so results match detect() on each image.
+        
+        Args:
+            images: List of PIL Image objects
+            original_sizes: Full-resolution sizes (width, height) to map boxes
+                to, one per image (default: each image's own size)
+            batch_size: Images per forward pass (default: self.batch_size)
+            resolution: (shortest edge, longest edge) to resize to
+                (default: self.resolution)
+            
+        Returns:
+            List of detection dictionaries, in the same order as images
+        """
+        batch_size = max(1, int(batch_size or self.batch_size))
+        sizes = [
+            (original_sizes[i] if original_sizes and original_sizes[i] else image.size)
+            for i, image in enumerate(images)
+        ]
+        
+        results = []
+        for start in range(0, len(images), batch_size):
+            chunk_results, _ = self.detect_padded(
+                images[start:start + batch_size],
+                sizes[start:start + batch_size],
+                resolution
+            )
+            results.extend(chunk_results)
+        return results
+    
+    def detect_padded(
+        self,
+        images: List[Image.Image],
+        original_sizes: List[Tuple[int, int]] = None,
+        resolution: Tuple[int, int] = None
+    ) -> Tuple[List[Dict], float]:
+        """Run one padded forward pass over all given images.
+        
+        Args:
+            images: List of PIL Image objects
+            original_sizes: Sizes (width, height) to map each image's boxes to
+                (default: each image's own size)
+            resolution: (shortest edge, longest edge) to resize to
+                (default: self.resolution)
+            
+        Returns:
+            Tuple of (detection dictionaries in the same order as images,
+            fraction of the padded batch that is padding)
+        """
+        sizes = [
+            (original_sizes[i] if original_sizes and original_sizes[i] else image.size)
+            for i, image in enumerate(images)
+        ]
+        
+        # Preprocess and pad all images into one batch
+        with time_stage('preprocess'):
+            inputs = self.processor(
+                images=images,
+                size=self._processor_size(resolution),
+                return_tensors="pt"
+            )
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        
+        padding_ratio = 1.0 - inputs["pixel_mask"].float().mean().item()
+        BATCH_PADDING_RATIO.observe(padding_ratio)
+        
+        # Run inference
+        with time_stage('forward'):
+            outputs, early_exit = self._forward(inputs)
+        
+        # Post-process with each image's own size
+        with time_stage('postprocess'):
+            target_sizes = torch.tensor(
+                [[height, width] for width, height in sizes]
+            ).to(self.device)
+            batch_results = self.processor.post_process_object_detection(
+                outputs,
+                target_sizes=target_sizes,
+                threshold=self.confidence_threshold
+            )
+            
+            return [
+                self._format_results(results, size, early_exit)
+                for results, size in zip(batch_results, sizes)
+            ], padding_ratio
+    
+    def _forward(self, inputs: Dict[str, torch.Tensor]) -> Tuple[object, Optional[Dict]]:
+        """Run the model at the configured precision.
+        
+        Args:
+            inputs: Processor outputs on self.device
+            
+        Returns:
+            Tuple of (model outputs with fp32 logits and boxes, early exit
+            report or None when early exit is disabled)
+        """
+        with torch.no_grad(), autocast_context(self.device, self.precision):
+            if self.early_exit is not None:
+                outputs, early_exit = self.early_exit(inputs)
+            else:
+                outputs, early_exit = self.model(**inputs), None
+        return outputs_to_float32(outputs), early_exit
+    
+    def _processor_size(self, resolution: Tuple[int, int] = None) -> Dict[str, int]:
+        """Build the processor's resize setting for a resolution.
+        
+        Args:
+            resolution: (shortest edge, longest edge), or None for self.resolution
+            
+        Returns:
+            Size dictionary for DetrImageProcessor
+        """
+        shortest_edge, longest_edge = resolution or self.resolution
+        return {"shortest_edge": shortest_edge, "longest_edge": longest_edge}
+    
+    def _format_results(
+        self,
+        results: Dict,
+        image_size: Tuple[int, int],
+        early_exit: Dict = None
+    ) -> Dict:
+        """Format post-processed model outputs for a single image.
+        
+        Args:
+            results: Post-processed results with scores, labels and boxes
+            image_size: Image size as (width, height)
+            early_exit: Early exit report of the forward pass, if enabled
+            
+        Returns:
+            Dictionary containing detections with labels, scores, and bounding boxes
+        """
         detections = []
         for score, label, box in zip(
             results["scores"].cpu().numpy(),
@@ -87,26 +410,17 @@ class DETRModel:
             }
             detections.append(detection)
         
-        return {
+        count_detections(detections)
+        
+        image_width, image_height = image_size
+        formatted = {
             "detections": detections,
             "num_detections": len(detections),
             "image_size": [image_width, image_height]
         }
-    
-    def detect_batch(self, images: List[Image.Image]) -> List[Dict]:
-        """Perform object detection on a batch of images.
-        
-        Args:
-            images: List of PIL Image objects
-            
-        Returns:
-            List of detection dictionaries
-        """
-        results = []
-        for image in images:
-            result = self.detect(image)
-            results.append(result)
-        return results
+        if early_exit is not None:
+            formatted["early_exit"] = dict(early_exit)
+        return formatted
     
     def save_model(self, path: str):
         """Save model to disk.
@@ -121,11 +435,13 @@ class DETRModel:
     def load_model(self, path: str):
         """Load model from disk.
         
+        The model is loaded with this instance's backend, precision and
+        early exit settings, like in __init__.
+        
         Args:
-            path: Directory path to load model from
+            path: Directory path to load model from (an export_onnx.py
+                directory for the onnx backend)
         """
-        self.model = DetrForObjectDetection.from_pretrained(path)
-        self.processor = DetrImageProcessor.from_pretrained(path)
-        self.model.to(self.device)
-        self.model.eval()
+        self._load(path, onnx_path=path)
+        self.model_name = path
         print(f"Model loaded from {path}")
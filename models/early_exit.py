@@ -0,0 +1,143 @@
+"""Confidence-based early exit across DETR decoder layers."""
+import threading
+import time
+from typing import Dict, Tuple
+
+import torch
+from transformers.models.detr.modeling_detr import DetrObjectDetectionOutput
+
+
+class _DecoderExit(Exception):
+    """Raised from a decoder layer hook to skip the remaining layers."""
+    
+    def __init__(self, logits: torch.Tensor, pred_boxes: torch.Tensor, layers: int):
+        super().__init__(layers)
+        self.logits = logits
+        self.pred_boxes = pred_boxes
+        self.layers = layers
+
+
+class DecoderEarlyExit:
+    """Stop DETR's decoder once its predictions have settled.
+    
+    Every decoder layer's output goes through the final layer norm and the
+    class and box heads, the same way DETR's auxiliary losses read them
+    during training. The decoder stops after a layer when, compared with
+    the previous layer, the same queries are above the confidence
+    threshold with the same labels, their boxes moved less than
+    box_tolerance, and no query's score is within margin of the threshold.
+    The whole batch exits together.
+    
+    Hooks are installed on the decoder layers once and only act during
+    calls of this object, so plain model(...) calls are unaffected.
+    """
+    
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        confidence_threshold: float,
+        margin: float = 0.1,
+        min_layers: int = 3,
+        box_tolerance: float = 0.01
+    ):
+        """Install the decoder hooks.
+        
+        Args:
+            model: DetrForObjectDetection (fp32, quantized or autocast)
+            confidence_threshold: Score above which a query is a detection
+            margin: Scores this close to the threshold keep the decoder going
+            min_layers: Decoder layers that always run
+            box_tolerance: Largest change of a detection's box between two
+                layers, in normalized (cx, cy, w, h) units
+        """
+        self.model = model
+        self.decoder = model.model.decoder
+        self.num_layers = len(self.decoder.layers)
+        self.confidence_threshold = float(confidence_threshold)
+        self.margin = float(margin)
+        self.min_layers = max(1, int(min_layers))
+        self.box_tolerance = float(box_tolerance)
+        
+        self._state = threading.local()
+        for index, layer in enumerate(self.decoder.layers):
+            layer.register_forward_pre_hook(self._start_layer)
+            layer.register_forward_hook(self._make_check(index + 1))
+    
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> Tuple[DetrObjectDetectionOutput, Dict]:
+        """Run the model, stopping the decoder early when possible.
+        
+        Args:
+            inputs: Processor outputs (pixel_values, pixel_mask)
+            
+        Returns:
+            Tuple of (outputs with logits and pred_boxes, report with the
+            decoder layers used and the estimated time saved in ms)
+        """
+        state = self._state
+        state.active = True
+        state.previous = None
+        state.layer_times = []
+        try:
+            outputs = self.model(**inputs)
+            layers = self.num_layers
+        except _DecoderExit as exit_:
+            outputs = DetrObjectDetectionOutput(logits=exit_.logits, pred_boxes=exit_.pred_boxes)
+            layers = exit_.layers
+        finally:
+            state.active = False
+        
+        layer_time = sum(state.layer_times) / len(state.layer_times) if state.layer_times else 0.0
+        return outputs, {
+            "decoder_layers": layers,
+            "decoder_layers_total": self.num_layers,
+            "saved_ms": round(layer_time * (self.num_layers - layers) * 1000, 2)
+        }
+    
+    def _start_layer(self, module, args):
+        """Record when a decoder layer starts (forward pre-hook)."""
+        if getattr(self._state, "active", False):
+            self._state.layer_start = time.perf_counter()
+    
+    def _make_check(self, layers: int):
+        """Build the forward hook that runs after the given number of layers."""
+        def check(module, args, output):
+            state = self._state
+            if not getattr(state, "active", False):
+                return
+            state.layer_times.append(time.perf_counter() - state.layer_start)
+            if layers >= self.num_layers or layers < self.min_layers - 1:
+                return
+            
+            # transformers 4.x decoder layers return (hidden_states, attentions...)
+            if isinstance(output, tuple):
+                output = output[0]
+            hidden_states = self.decoder.layernorm(output)
+            logits = self.model.class_labels_classifier(hidden_states)
+            pred_boxes = self.model.bbox_predictor(hidden_states).sigmoid()
+            
+            scores, labels = logits.float().softmax(-1)[..., :-1].max(-1)
+            above = scores >= self.confidence_threshold
+            previous, state.previous = state.previous, (above, labels, pred_boxes)
+            if previous is None or layers < self.min_layers:
+                return
+            
+            if self._settled(scores, above, labels, pred_boxes, *previous):
+                raise _DecoderExit(logits, pred_boxes, layers)
+        return check
+    
+    def _settled(self, scores, above, labels, pred_boxes, prev_above, prev_labels, prev_boxes) -> bool:
+        """Check whether a layer's predictions match the previous layer's.
+        
+        Returns:
+            True if the remaining layers are unlikely to change the detections
+        """
+        if not torch.equal(above, prev_above):
+            return False
+        if bool(((scores - self.confidence_threshold).abs() < self.margin).any()):
+            return False
+        if not bool(above.any()):
+            return True
+        if not torch.equal(labels[above], prev_labels[above]):
+            return False
+        box_change = (pred_boxes[above].float() - prev_boxes[above].float()).abs().max()
+        return bool(box_change <= self.box_tolerance)
@@ -0,0 +1,169 @@
+"""ONNX export and ONNX Runtime inference for DETR models."""
+import os
+import threading
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import torch
+from transformers import DetrConfig, DetrForObjectDetection, DetrImageProcessor
+from transformers.models.detr.modeling_detr import DetrObjectDetectionOutput
+
+
+ONNX_FILENAME = "model.onnx"
+ONNX_OPSET = 17
+
+
+class _DetrExportWrapper(torch.nn.Module):
+    """Expose DETR's forward pass as plain tensors in and out for export."""
+    
+    def __init__(self, model: DetrForObjectDetection):
+        super().__init__()
+        self.model = model
+    
+    def forward(self, pixel_values: torch.Tensor, pixel_mask: torch.Tensor):
+        outputs = self.model(pixel_values=pixel_values, pixel_mask=pixel_mask)
+        return outputs.logits, outputs.pred_boxes
+
+
+def export_onnx(
+    model_name: str,
+    output_dir: Union[str, Path],
+    opset_version: int = ONNX_OPSET
+) -> Path:
+    """Export a DETR model to ONNX with dynamic batch and spatial axes.
+    
+    Works for HuggingFace model names and for fine-tuned checkpoints saved
+    by DETRModel.save_model or DETRTrainer.save_checkpoint. The model
+    config and image processor are saved next to model.onnx, so the
+    exported directory is self-contained.
+    
+    Args:
+        model_name: Model name or checkpoint directory
+        output_dir: Directory to write model.onnx, config.json and
+            preprocessor_config.json to
+        opset_version: ONNX opset
+        
+    Returns:
+        Path of the exported ONNX file
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    model = DetrForObjectDetection.from_pretrained(model_name).eval()
+    processor = DetrImageProcessor.from_pretrained(model_name)
+    
+    # Trace with a padded batch of two so no shape is specialized to 1
+    pixel_values = torch.randn(2, 3, 800, 1066)
+    pixel_mask = torch.ones(2, 800, 1066, dtype=torch.int64)
+    pixel_mask[1, :, 800:] = 0
+    
+    onnx_path = output_dir / ONNX_FILENAME
+    with torch.no_grad():
+        torch.onnx.export(
+            _DetrExportWrapper(model),
+            (pixel_values, pixel_mask),
+            str(onnx_path),
+            input_names=["pixel_values", "pixel_mask"],
+            output_names=["logits", "pred_boxes"],
+            dynamic_axes={
+                "pixel_values": {0: "batch", 2: "height", 3: "width"},
+                "pixel_mask": {0: "batch", 1: "height", 2: "width"},
+                "logits": {0: "batch"},
+                "pred_boxes": {0: "batch"}
+            },
+            opset_version=opset_version,
+            dynamo=False
+        )
+    
+    model.config.save_pretrained(output_dir)
+    processor.save_pretrained(output_dir)
+    return onnx_path
+
+
+class OnnxDetrModel(torch.nn.Module):
+    """ONNX Runtime session that stands in for DetrForObjectDetection.
+    
+    Called like the PyTorch model (model(pixel_values=..., pixel_mask=...))
+    and returns a DetrObjectDetectionOutput with logits and pred_boxes, so
+    the processor's post-processing and all callers work unchanged. It has
+    no parameters; .to(), .eval() and .share_memory() are no-ops.
+    
+    The session (and its thread pool) is created on first use in each
+    process, so a model loaded before fork() works in the forked workers.
+    """
+    
+    def __init__(self, model_dir: Union[str, Path], num_threads: int = None):
+        """Load the config of an exported model.
+        
+        Args:
+            model_dir: Directory produced by export_onnx
+            num_threads: Intra-op threads (default: torch.get_num_threads()
+                in the process that first runs the model)
+        """
+        super().__init__()
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "The ONNX backend requires onnxruntime: pip install onnxruntime"
+            ) from e
+        
+        model_dir = Path(model_dir)
+        self.onnx_path = model_dir / ONNX_FILENAME
+        if not self.onnx_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found: {self.onnx_path}. Export it with: "
+                f"python export_onnx.py --output {model_dir}"
+            )
+        
+        self.num_threads = num_threads
+        self.config = DetrConfig.from_pretrained(model_dir)
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Get this process's ONNX Runtime session, creating it on first use."""
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    import onnxruntime as ort
+                    
+                    options = ort.SessionOptions()
+                    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    options.intra_op_num_threads = int(self.num_threads or torch.get_num_threads())
+                    options.inter_op_num_threads = 1
+                    
+                    self._session = ort.InferenceSession(
+                        str(self.onnx_path),
+                        options,
+                        providers=["CPUExecutionProvider"]
+                    )
+                    self._session_pid = os.getpid()
+        return self._session
+    
+    def forward(self, pixel_values: torch.Tensor, pixel_mask: torch.Tensor = None, **kwargs):
+        """Run the exported model.
+        
+        Args:
+            pixel_values: Batch of images, shape (batch, 3, height, width)
+            pixel_mask: Valid-pixel mask, shape (batch, height, width)
+            
+        Returns:
+            DetrObjectDetectionOutput with logits and pred_boxes
+        """
+        if pixel_mask is None:
+            pixel_mask = torch.ones(
+                pixel_values.shape[0], *pixel_values.shape[2:], dtype=torch.int64
+            )
+        
+        logits, pred_boxes = self.session.run(None, {
+            "pixel_values": pixel_values.detach().cpu().numpy().astype(np.float32, copy=False),
+            "pixel_mask": pixel_mask.detach().cpu().numpy().astype(np.int64, copy=False)
+        })
+        return DetrObjectDetectionOutput(
+            logits=torch.from_numpy(logits),
+            pred_boxes=torch.from_numpy(pred_boxes)
+        )
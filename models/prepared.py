@@ -0,0 +1,144 @@
+"""Prepared local model artifacts for fast, offline DETR loading."""
+import json
+from pathlib import Path
+from typing import Union
+
+import torch
+import transformers
+from safetensors.torch import load_file, save_file
+from transformers import DetrConfig, DetrForObjectDetection, DetrImageProcessor
+
+
+PREPARED_MANIFEST = "tedr_prepared.json"
+WEIGHTS_FILENAME = "model.safetensors"
+
+
+def is_prepared(model_name: Union[str, Path]) -> bool:
+    """Check whether a model name is a directory written by prepare_model.
+    
+    Args:
+        model_name: Model name or local path
+        
+    Returns:
+        True if the directory has a prepared-model manifest
+    """
+    return (Path(model_name) / PREPARED_MANIFEST).is_file()
+
+
+def prepare_model(model_name: str, output_dir: Union[str, Path]) -> Path:
+    """Write a model as a self-contained directory that loads without the hub.
+    
+    The weights are saved as one safetensors file keyed by the module's own
+    state dict names, next to the model config and the resolved image
+    processor config. The backbone is marked as not pretrained, so building
+    the model never fetches ImageNet weights. The directory is also a normal
+    HuggingFace checkpoint (for export_onnx.py and training).
+    
+    Args:
+        model_name: Model name or checkpoint directory
+        output_dir: Directory to write the prepared model to
+        
+    Returns:
+        Path of the output directory
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    model = DetrForObjectDetection.from_pretrained(model_name).eval()
+    processor = DetrImageProcessor.from_pretrained(model_name)
+    
+    # The weights below include the backbone, so never download it again
+    for cfg in (model.config, getattr(model.config, "backbone_config", None)):
+        if cfg is not None and getattr(cfg, "use_pretrained_backbone", False):
+            cfg.use_pretrained_backbone = False
+    
+    state_dict = {name: tensor.contiguous() for name, tensor in model.state_dict().items()}
+    save_file(state_dict, str(output_dir / WEIGHTS_FILENAME), metadata={"format": "pt"})
+    model.config.save_pretrained(output_dir)
+    processor.save_pretrained(output_dir)
+    
+    manifest = {
+        "source": str(model_name),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "tensors": len(state_dict)
+    }
+    (output_dir / PREPARED_MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return output_dir
+
+
+def load_processor(model_name: str) -> DetrImageProcessor:
+    """Load the image processor, from local files only for prepared models.
+    
+    Args:
+        model_name: Model name or local path
+        
+    Returns:
+        DetrImageProcessor instance
+    """
+    return DetrImageProcessor.from_pretrained(model_name, local_files_only=is_prepared(model_name))
+
+
+def _load_prepared(model_dir: Path) -> DetrForObjectDetection:
+    """Build a prepared model on the meta device and map its weights in.
+    
+    Args:
+        model_dir: Directory written by prepare_model
+        
+    Returns:
+        Model whose parameters are backed by the memory-mapped weights file
+        
+    Raises:
+        ValueError: If the weights do not match the model's state dict
+    """
+    config = DetrConfig.from_pretrained(model_dir, local_files_only=True)
+    with torch.device("meta"):
+        model = DetrForObjectDetection(config)
+    
+    # safetensors maps the file copy-on-write: pages are read on first use
+    # and shared by every process that loads the same file
+    state_dict = load_file(str(model_dir / WEIGHTS_FILENAME))
+    try:
+        model.load_state_dict(state_dict, strict=True, assign=True)
+    except RuntimeError as e:
+        raise ValueError(str(e)) from e
+    
+    if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+        raise ValueError("model has tensors that are not in the weights file")
+    return model
+
+
+def load_detr_model(model_name: str) -> DetrForObjectDetection:
+    """Load a DETR model, using the fast path for prepared directories.
+    
+    Prepared directories written with the installed transformers version
+    skip weight initialization and deserialization entirely. Anything else
+    (hub names, plain checkpoints, version mismatches) goes through
+    DetrForObjectDetection.from_pretrained.
+    
+    Args:
+        model_name: Model name or local path
+        
+    Returns:
+        Model in eval mode on the CPU
+    """
+    model = None
+    
+    if is_prepared(model_name):
+        model_dir = Path(model_name)
+        manifest = json.loads((model_dir / PREPARED_MANIFEST).read_text())
+        if manifest.get("transformers") == transformers.__version__:
+            try:
+                model = _load_prepared(model_dir)
+            except ValueError as e:
+                print(f"Prepared weights in {model_dir} do not match, loading with from_pretrained: {e}")
+        else:
+            print(
+                f"{model_dir} was prepared with transformers {manifest.get('transformers')}, "
+                f"loading with from_pretrained (re-run prepare_model.py to speed this up)"
+            )
+        if model is None:
+            model = DetrForObjectDetection.from_pretrained(model_dir, local_files_only=True)
+    else:
+        model = DetrForObjectDetection.from_pretrained(model_name)
+    return model.eval()
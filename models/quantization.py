@@ -0,0 +1,140 @@
+"""INT8 dynamic quantization of DETR models for CPU inference."""
+import os
+import hashlib
+import threading
+import warnings
+from pathlib import Path
+from typing import Callable, Optional
+
+import torch
+import transformers
+from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+
+# Submodules whose nn.Linear layers are quantized. The convolutional backbone
+# and the class/box prediction heads stay in fp32.
+QUANTIZED_SUBMODULES = ("model.encoder", "model.decoder")
+
+
+def quantize_transformer(model: torch.nn.Module) -> torch.nn.Module:
+    """Apply INT8 dynamic quantization to the transformer's linear layers.
+    
+    Weights of the encoder and decoder linear layers are stored as int8
+    and activations are quantized on the fly per batch, so no calibration
+    data is needed. Dynamic quantization only runs on CPU.
+    
+    Args:
+        model: fp32 DetrForObjectDetection in eval mode
+        
+    Returns:
+        Quantized copy of the model
+    """
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao, which is
+        # not a dependency; the eager-mode API still works
+        warnings.simplefilter("ignore")
+        return quantize_dynamic(
+            model,
+            {name: default_dynamic_qconfig for name in QUANTIZED_SUBMODULES},
+            dtype=torch.qint8,
+            inplace=False
+        )
+
+
+def hub_revision(model_name: str) -> Optional[str]:
+    """Resolve the commit hash a hub model name currently points to.
+    
+    Fetches (or, offline, reads from the local HuggingFace cache) the
+    model's config.json, whose snapshot directory is named after the
+    commit it belongs to.
+    
+    Args:
+        model_name: HuggingFace model name
+        
+    Returns:
+        Commit hash, or None if it cannot be resolved
+    """
+    try:
+        from huggingface_hub import hf_hub_download
+        config_path = Path(hf_hub_download(model_name, "config.json"))
+    except Exception:
+        return None
+    if config_path.parent.parent.name != "snapshots":
+        return None
+    return config_path.parent.name
+
+
+def quantized_cache_path(cache_dir: str, model_name: str) -> Optional[Path]:
+    """Get the cache file of a quantized model.
+    
+    The key covers the model name, the modification time of local weights
+    (or the commit hash of hub models) and the torch/transformers
+    versions, since pickled quantized modules are not portable across
+    versions.
+    
+    Args:
+        cache_dir: Directory holding quantized models
+        model_name: Name or local path of the fp32 model
+        
+    Returns:
+        Path of the cache file, or None for a hub model whose commit
+        cannot be resolved
+    """
+    key = f"{model_name}|{torch.__version__}|{transformers.__version__}|{QUANTIZED_SUBMODULES}"
+    local_path = Path(model_name)
+    if local_path.is_dir():
+        key += "|" + "|".join(
+            f"{p.name}:{p.stat().st_mtime_ns}" for p in sorted(local_path.iterdir())
+        )
+    else:
+        # An upstream update must not keep serving stale quantized weights
+        revision = hub_revision(model_name)
+        if revision is None:
+            return None
+        key += f"|{revision}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    safe_name = model_name.strip("/").replace("/", "--")
+    return Path(cache_dir) / f"{safe_name}-int8-{digest}.pt"
+
+
+def load_quantized(
+    model_name: str,
+    load_fp32: Callable[[], torch.nn.Module],
+    cache_dir: Optional[str] = None
+) -> torch.nn.Module:
+    """Load an INT8 quantized model from the disk cache, or build and cache it.
+    
+    Args:
+        model_name: Name or local path of the fp32 model
+        load_fp32: Callable returning the fp32 model in eval mode
+        cache_dir: Directory holding quantized models (None disables caching)
+        
+    Returns:
+        Quantized model in eval mode
+    """
+    path = quantized_cache_path(cache_dir, model_name) if cache_dir else None
+    if cache_dir and path is None:
+        print(f"Could not resolve the revision of {model_name}, not caching its quantized model")
+    
+    if path is not None and path.exists():
+        try:
+            # The cache is written by this process's own code, so unpickling is trusted
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            print(f"Loaded quantized model from cache: {path}")
+            return model.eval()
+        except Exception as e:
+            print(f"Ignoring unreadable quantized model cache {path}: {e}")
+    
+    model = quantize_transformer(load_fp32().eval())
+    
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            torch.save(model, tmp_path)
+            os.replace(tmp_path, path)
+            print(f"Saved quantized model to cache: {path}")
+        except OSError as e:
+            print(f"Could not cache quantized model at {path}: {e}")
+    
+    return model.eval()
@@ -0,0 +1,53 @@
+"""Inference resolution presets for DETR models (no torch dependency)."""
+from typing import Tuple, Union
+
+
+# Named inference resolutions (shortest edge in pixels), fastest first
+RESOLUTION_PRESETS = {
+    "fast": 480,
+    "balanced": 640,
+    "accurate": 800
+}
+
+# Bounds of the shortest edge DETR inputs are resized to, in pixels
+MIN_RESOLUTION = 64
+MAX_RESOLUTION = 2048
+
+# DETR's longest-edge cap relative to the shortest edge (1333 / 800)
+LONGEST_EDGE_RATIO = 1333 / 800
+
+
+def resolve_resolution(image_size: Union[int, str], max_size: int = None) -> Tuple[int, int]:
+    """Resolve an image size setting to shortest and longest edge limits.
+    
+    Args:
+        image_size: Preset name ('fast', 'balanced', 'accurate') or shortest
+            edge in pixels
+        max_size: Longest edge in pixels (default: shortest edge * 1333/800)
+        
+    Returns:
+        Tuple of (shortest edge, longest edge)
+        
+    Raises:
+        ValueError: If image_size is not a preset or a size between 64 and 2048
+    """
+    if isinstance(image_size, str):
+        key = image_size.strip().lower()
+        if key in RESOLUTION_PRESETS:
+            image_size = RESOLUTION_PRESETS[key]
+        elif key.isdigit():
+            image_size = int(key)
+        else:
+            raise ValueError(
+                f"Unknown resolution '{image_size}', expected one of "
+                f"{', '.join(RESOLUTION_PRESETS)} or a size in pixels"
+            )
+    
+    shortest_edge = int(image_size)
+    if not MIN_RESOLUTION <= shortest_edge <= MAX_RESOLUTION:
+        raise ValueError(
+            f"Resolution must be between {MIN_RESOLUTION} and {MAX_RESOLUTION} pixels, got {shortest_edge}"
+        )
+    
+    longest_edge = int(max_size) if max_size else round(shortest_edge * LONGEST_EDGE_RATIO)
+    return shortest_edge, max(shortest_edge, longest_edge)
@@ -1,4 +1,5 @@
 """Training pipeline for DETR model on custom datasets."""
+import sys
 import torch
 import torch.nn as nn
 from torch.utils.data import DataLoader, Dataset
@@ -11,6 +12,11 @@ from tqdm import tqdm
 from typing import Dict, List, Tuple
 import yaml
 
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.prepared import is_prepared, load_detr_model, load_processor
+
 
 class COCODataset(Dataset):
     """COCO format dataset for DETR training."""
@@ -120,11 +126,12 @@ class DETRTrainer:
         print(f"Training on device: {self.device}")
         
         # Load model and processor
-        self.processor = DetrImageProcessor.from_pretrained(model_name)
+        self.processor = load_processor(model_name)
         self.model = DetrForObjectDetection.from_pretrained(
             model_name,
             num_labels=num_classes,
-            ignore_mismatched_sizes=True
+            ignore_mismatched_sizes=True,
+            local_files_only=is_prepared(model_name)
         )
         self.model.to(self.device)
         
@@ -253,8 +260,8 @@ class DETRTrainer:
         Args:
             path: Directory containing checkpoint
         """
-        self.model = DetrForObjectDetection.from_pretrained(path)
-        self.processor = DetrImageProcessor.from_pretrained(path)
+        self.model = load_detr_model(path)
+        self.processor = load_processor(path)
         self.model.to(self.device)
 
 
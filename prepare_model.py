@@ -0,0 +1,57 @@
+"""
+Prepare a DETR model as a local artifact that loads in well under a second.
+
+Writes memory-mapped safetensors weights, the model config and the resolved
+image processor config. Point model.name (or TEDR_MODEL_NAME) at the output
+directory; loading it never contacts the HuggingFace hub.
+
+Usage:
+    python prepare_model.py --model facebook/detr-resnet-50 --output ./prepared/detr-resnet-50
+    python prepare_model.py --model ./checkpoints/best --output ./prepared/detr-finetuned
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import argparse
+import time
+
+from models.prepared import WEIGHTS_FILENAME, load_detr_model, prepare_model
+
+
+def main():
+    """Main function for CLI usage."""
+    parser = argparse.ArgumentParser(
+        description="Prepare a DETR model or fine-tuned checkpoint for fast offline loading"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="facebook/detr-resnet-50",
+        help="Model name or checkpoint directory (default: facebook/detr-resnet-50)"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default="./prepared/detr-resnet-50",
+        help="Output directory (default: ./prepared/detr-resnet-50)"
+    )
+    
+    args = parser.parse_args()
+    
+    print(f"Preparing {args.model} in {args.output}...")
+    start_time = time.time()
+    output_dir = prepare_model(args.model, args.output)
+    size_mb = (output_dir / WEIGHTS_FILENAME).stat().st_size / (1024 * 1024)
+    print(f"Prepared {output_dir} ({size_mb:.1f} MB) in {time.time() - start_time:.1f}s")
+    
+    start_time = time.time()
+    load_detr_model(str(output_dir))
+    print(f"Loads in {time.time() - start_time:.2f}s")
+    print(f"Serve it with model.name: \"{output_dir}\" in config.yaml")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """Simple test to verify TEDR system components."""
+import subprocess
 import sys
 from pathlib import Path
 
@@ -68,6 +69,68 @@ def test_model_structure():
         print(f"\n✗ Model structure test failed: {e}")
         return False
 
+def test_import_time():
+    """Test that config and app factory imports do not pull in the model stack."""
+    print("\nTesting import time...")
+    
+    try:
+        heavy_modules = {'torch', 'transformers', 'onnxruntime', 'model.detr_detector', 'models.detr_model'}
+        result = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime', '-c',
+                'import model; from model.config import Config; '
+                'from backend.config import config; from app.app import create_app'
+            ],
+            capture_output=True,
+            text=True,
+            cwd=str(Path(__file__).parent)
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+        
+        # Lines look like "import time: <self us> | <cumulative us> | <indented module>"
+        timings = [line.split('|') for line in result.stderr.splitlines() if line.startswith('import time:')]
+        imported = {fields[2].strip() for fields in timings if len(fields) == 3 and fields[1].strip().isdigit()}
+        total = sum(int(fields[1]) for fields in timings if len(fields) == 3 and fields[1].strip().isdigit()
+                    and not fields[2].startswith('  '))
+        print(f"Config and app factory imported in {total / 1e6:.2f}s")
+        
+        pulled = sorted(heavy_modules & imported)
+        assert not pulled, f"Importing config/app factory pulled in {', '.join(pulled)}"
+        
+        print("✓ No torch/transformers at import time")
+        return True
+    except Exception as e:
+        print(f"\n✗ Import time test failed: {e}")
+        return False
+
+def test_roi_filter():
+    """Test that ROI filtering keeps boxes whose bottom-centre is inside or on the polygon."""
+    print("\nTesting ROI filtering...")
+    
+    try:
+        from utils.roi import RegionOfInterest
+        
+        roi = RegionOfInterest.parse({'polygon': [[220, 330], [1100, 330], [1280, 720], [0, 720]]})
+        detections = [
+            {'label': 'car', 'bbox': [500, 600, 600, 720]},     # touches the bottom of the frame
+            {'label': 'car', 'bbox': [500, 600, 600, 700]},     # inside
+            {'label': 'truck', 'bbox': [1200, 600, 1280, 720]}, # on the slanted edge's corner
+            {'label': 'car', 'bbox': [0, 200, 100, 330]}        # outside, left of the top edge
+        ]
+        kept = roi.filter_detections(detections, offset=(0, 0))
+        assert [d['bbox'] for d in kept] == [[500, 600, 600, 720], [500, 600, 600, 700], [1200, 600, 1280, 720]], kept
+        
+        # Boxes are mapped from crop to full-frame coordinates
+        left, top = roi.crop_box((1280, 720))[:2]
+        kept = roi.filter_detections([{'label': 'car', 'bbox': [280, 270, 380, 390]}], offset=(left, top))
+        assert kept and kept[0]['bbox'] == [280, 600, 380, 720], kept
+        
+        print("✓ Boxes touching the ROI boundary are kept")
+        return True
+    except Exception as e:
+        print(f"\n✗ ROI filtering test failed: {e}")
+        return False
+
 def main():
     """Run all tests."""
     print("=" * 60)
@@ -77,7 +140,9 @@ def main():
     tests = [
         test_imports,
         test_config,
-        test_model_structure
+        test_model_structure,
+        test_import_time,
+        test_roi_filter
     ]
     
     results = []
@@ -0,0 +1,169 @@
+"""Response encoders for TEDR detection results.
+
+Two formats are negotiated via the Accept header:
+
+- JSON (default): encoded with orjson when it is installed, otherwise with
+  a compact stdlib json.dumps.
+- Packed binary (application/x-tedr-detections): a fixed header followed
+  by float32 boxes and scores and int16 label ids, for machine clients.
+
+Packed layout (little-endian):
+
+    magic         4 bytes   b'TEDR'
+    version       uint8     1
+    reserved      uint8     0
+    count         uint16    number of detections N
+    image_width   uint32
+    image_height  uint32
+    proc_time     float32   processing time in seconds (NaN if unknown)
+    boxes         float32   N x 4, [x1, y1, x2, y2] in pixels
+    scores        float32   N
+    label_ids     int16     N (COCO label ids)
+"""
+import json
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+
+JSON_MEDIA_TYPE = 'application/json'
+BINARY_MEDIA_TYPE = 'application/x-tedr-detections'
+
+BINARY_MAGIC = b'TEDR'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<4sBBHIIf')
+
+
+def dumps_json(obj) -> bytes:
+    """Serialize an object to compact JSON bytes.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def wants_binary(accept: str) -> bool:
+    """Check whether an Accept header asks for the packed binary format.
+
+    Args:
+        accept: Value of the Accept header (may be None)
+
+    Returns:
+        True if the packed format is preferred over JSON
+    """
+    if not accept:
+        return False
+
+    best_type, best_q = None, -1.0
+    for part in accept.split(','):
+        fields = part.strip().split(';')
+        media_type = fields[0].strip().lower()
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in (BINARY_MEDIA_TYPE, JSON_MEDIA_TYPE) and q > best_q:
+            best_type, best_q = media_type, q
+
+    return best_type == BINARY_MEDIA_TYPE and best_q > 0
+
+
+def encode_binary(results: Dict) -> bytes:
+    """Pack detection results into the compact binary format.
+
+    Accepts both the backend result format ('bbox'/'confidence') and the
+    Flask app format ('box'/'score'). Fields other than boxes, scores,
+    label ids, image size and processing time are not included.
+
+    Args:
+        results: Detection result dictionary
+
+    Returns:
+        Packed bytes
+    """
+    detections = results.get('detections', [])
+    count = len(detections)
+
+    boxes = np.array(
+        [det['bbox'] if 'bbox' in det else det['box'] for det in detections],
+        dtype='<f4'
+    ).reshape(count, 4)
+    scores = np.array(
+        [det['confidence'] if 'confidence' in det else det['score'] for det in detections],
+        dtype='<f4'
+    )
+    label_ids = np.array([det['label_id'] for det in detections], dtype='<i2')
+
+    image_width, image_height = results.get('image_size') or (0, 0)
+    processing_time = results.get('processing_time')
+    header = _HEADER.pack(
+        BINARY_MAGIC,
+        BINARY_VERSION,
+        0,
+        count,
+        int(image_width),
+        int(image_height),
+        float('nan') if processing_time is None else float(processing_time)
+    )
+    return header + boxes.tobytes() + scores.tobytes() + label_ids.tobytes()
+
+
+def decode_binary(data: bytes) -> Dict:
+    """Unpack the compact binary format (reference decoder for clients).
+
+    Args:
+        data: Packed bytes produced by encode_binary
+
+    Returns:
+        Dictionary with 'boxes' (N x 4 array), 'scores', 'label_ids',
+        'image_size' and 'processing_time'
+    """
+    magic, version, _, count, width, height, processing_time = _HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a TEDR packed detection payload")
+
+    offset = _HEADER.size
+    boxes = np.frombuffer(data, dtype='<f4', count=count * 4, offset=offset).reshape(count, 4)
+    offset += count * 16
+    scores = np.frombuffer(data, dtype='<f4', count=count, offset=offset)
+    offset += count * 4
+    label_ids = np.frombuffer(data, dtype='<i2', count=count, offset=offset)
+
+    return {
+        'boxes': boxes,
+        'scores': scores,
+        'label_ids': label_ids,
+        'image_size': [width, height],
+        'processing_time': processing_time
+    }
+
+
+def encode_results(results: Dict, accept: str = None) -> Tuple[bytes, str]:
+    """Encode detection results in the format negotiated by the Accept header.
+
+    Args:
+        results: Detection result dictionary
+        accept: Value of the request's Accept header
+
+    Returns:
+        Tuple of (response body, media type)
+    """
+    if wants_binary(accept):
+        return encode_binary(results), BINARY_MEDIA_TYPE
+    return dumps_json(results), JSON_MEDIA_TYPE
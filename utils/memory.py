@@ -0,0 +1,113 @@
+"""Shared-memory model weights and process memory reporting for TEDR."""
+import os
+from typing import Dict, List
+
+
+def share_model_weights(model) -> int:
+    """Move a model's parameters and buffers into shared memory.
+    
+    Call this in the parent process after loading the model and before
+    forking workers. Forked workers then map the same physical pages, and
+    since shared pages are never copied on write, per-worker memory does not
+    grow with the size of the model.
+    
+    Args:
+        model: torch.nn.Module to share
+        
+    Returns:
+        Number of bytes of weights placed in shared memory
+    """
+    model.share_memory()
+    
+    num_bytes = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        num_bytes += tensor.numel() * tensor.element_size()
+    return num_bytes
+
+
+def process_memory(pid: int = None) -> Dict[str, float]:
+    """Get memory usage of a process from /proc/<pid>/smaps_rollup.
+    
+    RSS counts shared weight pages in every worker, so private memory (and
+    PSS, which splits shared pages between the processes mapping them) is
+    what shows whether a worker really holds its own copy of the model.
+    
+    Args:
+        pid: Process ID (default: current process)
+        
+    Returns:
+        Dictionary with rss_mb, pss_mb, shared_mb and private_mb, or an empty
+        dictionary when the platform does not provide smaps_rollup
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return {}
+    
+    shared_kb = fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    private_kb = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {
+        'rss_mb': round(fields.get('Rss', 0) / 1024, 1),
+        'pss_mb': round(fields.get('Pss', 0) / 1024, 1),
+        'shared_mb': round(shared_kb / 1024, 1),
+        'private_mb': round(private_kb / 1024, 1)
+    }
+
+
+def memory_report(pids: List[int]) -> str:
+    """Format a per-process memory table.
+    
+    Args:
+        pids: Process IDs to report on
+        
+    Returns:
+        Multi-line table with RSS, PSS, shared and private memory per process
+    """
+    lines = [f"{'PID':>8} {'RSS MB':>10} {'PSS MB':>10} {'Shared MB':>10} {'Private MB':>11}"]
+    for pid in pids:
+        mem = process_memory(pid)
+        if not mem:
+            lines.append(f"{pid:>8} {'n/a':>10}")
+            continue
+        lines.append(
+            f"{pid:>8} {mem['rss_mb']:>10} {mem['pss_mb']:>10} "
+            f"{mem['shared_mb']:>10} {mem['private_mb']:>11}"
+        )
+    return "\n".join(lines)
+
+
+def reset_peak_memory() -> bool:
+    """Reset the peak RSS counter of the current process (Linux only).
+    
+    Returns:
+        True if the counter was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_memory_mb() -> float:
+    """Get the peak RSS of the current process since start or the last reset.
+    
+    Returns:
+        Peak resident memory in MB, or 0.0 when the platform does not provide it
+    """
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
@@ -0,0 +1,122 @@
+"""Prometheus metrics for TEDR inference."""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+
+# Latency buckets (seconds) covering sub-millisecond NMS up to multi-second CPU forward passes
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_LATENCY = Histogram(
+    'tedr_stage_duration_seconds',
+    'Time spent in each inference stage (decode, preprocess, forward, postprocess, nms, render, serialize)',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+
+REQUESTS = Counter(
+    'tedr_requests_total',
+    'Detection requests handled',
+    ['endpoint', 'status']
+)
+
+ERRORS = Counter(
+    'tedr_errors_total',
+    'Detection requests that failed with a server error',
+    ['endpoint']
+)
+
+DETECTIONS = Counter(
+    'tedr_detections_total',
+    'Objects detected',
+    ['label']
+)
+
+QUEUE_DEPTH = Gauge(
+    'tedr_queue_depth',
+    'Inference calls waiting for a worker',
+    multiprocess_mode='livesum'
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    'tedr_requests_in_progress',
+    'Detection requests currently being handled',
+    multiprocess_mode='livesum'
+)
+
+BATCH_PADDING_RATIO = Histogram(
+    'tedr_batch_padding_ratio',
+    'Fraction of each padded inference batch that is padding',
+    buckets=(0.0, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0)
+)
+
+MODEL_LOAD_SECONDS = Gauge(
+    'tedr_model_load_seconds',
+    'Time taken to load the model',
+    multiprocess_mode='max'
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Record the duration of a block in the stage latency histogram.
+
+    Args:
+        stage: Stage name, e.g. 'decode', 'forward' or 'nms'
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start_time)
+
+
+def count_detections(detections: List[Dict]):
+    """Add detections to the per-class counter.
+
+    Args:
+        detections: List of detection dictionaries with a 'label' key
+    """
+    for det in detections:
+        DETECTIONS.labels(label=det['label']).inc()
+
+
+def record_request(endpoint: str, status: int):
+    """Count a handled detection request.
+
+    Args:
+        endpoint: Request path
+        status: HTTP status code of the response
+    """
+    REQUESTS.labels(endpoint=endpoint, status=str(status)).inc()
+    if status >= 500:
+        ERRORS.labels(endpoint=endpoint).inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (multi-process serving), metrics
+    of all worker processes are aggregated.
+
+    Returns:
+        Tuple of (response body, content type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,197 @@
+"""Regions of interest for fixed cameras."""
+import json
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class RoiError(ValueError):
+    """Raised when a region of interest cannot be applied to an image."""
+
+
+class RoiOutsideImage(RoiError):
+    """Raised when a region of interest does not overlap the image."""
+
+
+class RoiTooSmall(RoiError):
+    """Raised when a region of interest is below the model's minimum input size."""
+
+
+class RegionOfInterest:
+    """Polygon in full-frame pixel coordinates that detection is limited to.
+    
+    The image is cropped to the polygon's bounding rectangle before
+    inference, so the model only spends compute on that region. A
+    detection is kept when the midpoint of its bottom edge, where the
+    object meets the road, lies inside the polygon.
+    """
+    
+    def __init__(self, points: Sequence[Sequence[float]]):
+        """Initialize region.
+        
+        Args:
+            points: Polygon vertices as [x, y] pairs in full-frame pixels
+            
+        Raises:
+            ValueError: If there are fewer than three vertices
+        """
+        self.points = np.asarray(points, dtype=np.float64)
+        if self.points.ndim != 2 or self.points.shape[1] != 2 or len(self.points) < 3:
+            raise ValueError("An ROI polygon needs at least three [x, y] points")
+        if not np.isfinite(self.points).all() or (self.points < 0).any():
+            raise ValueError("ROI coordinates must be non-negative pixel positions")
+        
+        x1, y1 = self.points.min(axis=0)
+        x2, y2 = self.points.max(axis=0)
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("ROI polygon has no area")
+        self.bounds = (float(x1), float(y1), float(x2), float(y2))
+        
+        # An axis-aligned rectangle contains everything inside its crop
+        corners = {(x, y) for x in (x1, x2) for y in (y1, y2)}
+        self.is_rectangle = len(self.points) == 4 and {tuple(p) for p in self.points.tolist()} == corners
+    
+    @classmethod
+    def from_rect(cls, rect: Sequence[float]) -> 'RegionOfInterest':
+        """Create a rectangular region.
+        
+        Args:
+            rect: [x1, y1, x2, y2] in full-frame pixels
+            
+        Returns:
+            RegionOfInterest instance
+            
+        Raises:
+            ValueError: If rect does not have four numbers
+        """
+        if len(rect) != 4:
+            raise ValueError("An ROI rectangle is [x1, y1, x2, y2]")
+        x1, y1, x2, y2 = (float(v) for v in rect)
+        return cls([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+    
+    @classmethod
+    def parse(cls, value: Union[str, Dict, Sequence]) -> 'RegionOfInterest':
+        """Parse a region from config or a request parameter.
+        
+        Accepts {"polygon": [[x, y], ...]}, {"rect": [x1, y1, x2, y2]}, a
+        bare list of [x, y] points or of four numbers, or any of these as a
+        JSON string. "x1,y1,x2,y2" is also accepted as a rectangle.
+        
+        Args:
+            value: Region description
+            
+        Returns:
+            RegionOfInterest instance
+            
+        Raises:
+            ValueError: If value is not a valid region
+        """
+        if isinstance(value, RegionOfInterest):
+            return value
+        if isinstance(value, str):
+            text = value.strip()
+            try:
+                value = json.loads(text if text[:1] in '[{' else f"[{text}]")
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid ROI '{value}': {e}") from e
+        
+        try:
+            if isinstance(value, dict):
+                if 'polygon' in value:
+                    return cls(value['polygon'])
+                if 'rect' in value:
+                    return cls.from_rect(value['rect'])
+                raise ValueError("An ROI needs a 'polygon' or a 'rect'")
+            if len(value) == 4 and all(isinstance(v, (int, float)) for v in value):
+                return cls.from_rect(value)
+            return cls(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid ROI: {e}") from e
+    
+    def crop_box(self, image_size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """Get the pixel rectangle to crop, clipped to the image.
+        
+        Args:
+            image_size: Full-frame size as (width, height)
+            
+        Returns:
+            Crop box (left, top, right, bottom) in full-frame pixels
+            
+        Raises:
+            RoiOutsideImage: If the region lies outside the image
+        """
+        width, height = image_size
+        x1, y1, x2, y2 = self.bounds
+        left, top = max(0, int(np.floor(x1))), max(0, int(np.floor(y1)))
+        right, bottom = min(width, int(np.ceil(x2))), min(height, int(np.ceil(y2)))
+        if right <= left or bottom <= top:
+            raise RoiOutsideImage(f"ROI {self.to_list()} lies outside the {width}x{height} image")
+        return left, top, right, bottom
+    
+    def contains(self, points: np.ndarray, tolerance: float = 1e-6) -> np.ndarray:
+        """Test which points lie inside the polygon or on its boundary.
+        
+        Points on an edge count as inside, so boxes clipped to the frame
+        border (whose bottom-centre lands on the polygon's bottom edge)
+        are kept. Other points use the even-odd rule.
+        
+        Args:
+            points: Array of shape (N, 2) with [x, y] positions
+            tolerance: Distance in pixels within which a point is on an edge
+            
+        Returns:
+            Boolean array of shape (N,)
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x, y = points[:, :1], points[:, 1:]
+        x1, y1 = self.points[:, 0], self.points[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        
+        # Distance of each point to each edge segment (repeated vertices
+        # give a zero-length edge, handled by the vertex distance check)
+        dx, dy = x2 - x1, y2 - y1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.nan_to_num(((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy))
+        t = np.clip(t, 0.0, 1.0)
+        on_edge = (np.hypot(x - (x1 + t * dx), y - (y1 + t * dy)) <= tolerance).any(axis=1)
+        
+        # Count polygon edges crossed by a ray from each point towards +x
+        straddles = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        crossings = np.count_nonzero(straddles & (x < x_cross), axis=1)
+        return on_edge | (crossings % 2 == 1)
+    
+    def filter_detections(self, detections: List[Dict], offset: Tuple[float, float] = (0, 0)) -> List[Dict]:
+        """Map detections from crop to full-frame pixels and drop those outside.
+        
+        Args:
+            detections: Detections with 'bbox' [x1, y1, x2, y2] in crop pixels
+            offset: (left, top) of the crop in the full frame
+            
+        Returns:
+            Detections inside the region, with full-frame boxes
+        """
+        if not detections:
+            return []
+        
+        left, top = offset
+        boxes = np.array([d['bbox'] for d in detections], dtype=np.float64) + [left, top, left, top]
+        if self.is_rectangle:
+            keep = np.ones(len(detections), dtype=bool)
+        else:
+            anchors = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+            keep = self.contains(anchors)
+        
+        return [
+            {**detection, 'bbox': box.tolist()}
+            for detection, box, inside in zip(detections, boxes, keep)
+            if inside
+        ]
+    
+    def to_list(self) -> List[List[float]]:
+        """Get the polygon vertices as a JSON-serialisable list."""
+        return self.points.tolist()
+    
+    def __repr__(self) -> str:
+        return f"RegionOfInterest({self.to_list()})"